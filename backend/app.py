@@ -1,9 +1,14 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 import logging
 import tempfile
+import uuid
+import aiofiles
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +27,7 @@ from utils.chunker import chunk_text
 from utils.gemini import generate_answer_from_context
 from utils.chat_history import ChatHistory
 from utils.qdrant_store import create_qdrant_store
+from utils.semantic_cache import SemanticCache
 
 APP_DIR = Path(__file__).parent
 
@@ -29,12 +35,27 @@ APP_DIR = Path(__file__).parent
 TEMP_DIR = Path(tempfile.gettempdir()) / "learnix_uploads"
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# Uploads are copied to disk in 1 MiB pieces
+UPLOAD_READ_SIZE = 1 << 20
+
+# Documents with at least this many chunks are uploaded with HNSW indexing paused
+BULK_UPLOAD_MIN_CHUNKS = int(os.getenv("BULK_UPLOAD_MIN_CHUNKS", "500"))
+
+# Bounded pool for CPU-heavy work (text extraction, chunking, embedding)
+worker_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
 # Initialize chat history
 chat_history = ChatHistory(APP_DIR / "storage")
 
 # Initialize Qdrant store
 qdrant_store = None
 
+# Answers to recent questions, matched by embedding similarity
+semantic_cache = SemanticCache(
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+)
+
 app = FastAPI(title="Learnix - College AI Assistant")
 
 # CORS for development
@@ -77,53 +98,67 @@ def health():
     return {"status": "error", "qdrant": "not connected"}
 
 
+def _index_document(temp_file_path: Path, filename: str, file_size: int) -> Dict:
+    """Extract, chunk and embed an uploaded file (runs in the worker pool)."""
+    # The extractors take the whole file as bytes, so it is read back in full
+    # here; streaming only keeps the upload itself out of memory while it arrives
+    with open(temp_file_path, 'rb') as f:
+        content = f.read()
+    
+    # Extract and clean text
+    logger.info(f"Processing file: {filename}")
+    text = process_file(filename, content)
+    if not text:
+        logger.warning(f"No text extracted from: {filename}")
+        raise HTTPException(status_code=400, detail="No text extracted from file")
+
+    logger.info(f"Extracted {len(text)} characters from {filename}")
+    
+    # Split into chunks for better retrieval
+    # process_file() already collapsed whitespace, so skip chunk_text's own pass
+    chunks = chunk_text(text, chunk_size=1000, overlap=200, already_normalized=True)
+    logger.info(f"Split into {len(chunks)} chunks")
+
+    # Store chunks directly in Qdrant with embeddings
+    logger.info(f"Storing {len(chunks)} chunks in Qdrant")
+    return qdrant_store.upsert_chunks(
+        chunks=chunks,
+        filename=filename,
+        metadata={
+            "file_size": file_size,
+            "text_length": len(text)
+        },
+        bulk=len(chunks) >= BULK_UPLOAD_MIN_CHUNKS
+    )
+
+
 @app.post("/api/upload/")
 async def upload_file(file: UploadFile = File(...)):
     """Upload and process a document, storing chunks directly in Qdrant."""
+    # Unique per request: concurrent uploads of the same filename must not
+    # share (and truncate or delete) each other's temporary file
+    temp_file_path = TEMP_DIR / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
     try:
         if not qdrant_store:
             raise HTTPException(status_code=500, detail="Qdrant store not initialized")
         
-        content = await file.read()
-        logger.info(f"Uploading file: {file.filename}, size: {len(content)} bytes")
-        
-        # Save to temporary location for processing
-        temp_file_path = TEMP_DIR / file.filename
-        with open(temp_file_path, 'wb') as f:
-            f.write(content)
+        # Stream the upload to a temporary file instead of reading it into memory
+        file_size = 0
+        async with aiofiles.open(temp_file_path, 'wb') as f:
+            while chunk := await file.read(UPLOAD_READ_SIZE):
+                await f.write(chunk)
+                file_size += len(chunk)
+        logger.info(f"Uploading file: {file.filename}, size: {file_size} bytes")
         
-        # Extract and clean text
-        logger.info(f"Processing file: {file.filename}")
-        text = process_file(file.filename, content)
-        if not text:
-            logger.warning(f"No text extracted from: {file.filename}")
-            # Clean up temp file
-            if temp_file_path.exists():
-                temp_file_path.unlink()
-            raise HTTPException(status_code=400, detail="No text extracted from file")
-
-        logger.info(f"Extracted {len(text)} characters from {file.filename}")
-        
-        # Split into chunks for better retrieval
-        chunks = chunk_text(text, chunk_size=1000, overlap=200)
-        logger.info(f"Split into {len(chunks)} chunks")
-
-        # Store chunks directly in Qdrant with embeddings
-        logger.info(f"Storing {len(chunks)} chunks in Qdrant")
-        result = qdrant_store.upsert_chunks(
-            chunks=chunks,
-            filename=file.filename,
-            metadata={
-                "file_size": len(content),
-                "text_length": len(text)
-            }
+        # Extraction, chunking and embedding are CPU-bound; keep them off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            worker_pool, _index_document, temp_file_path, file.filename, file_size
         )
         
-        # Clean up temporary file
-        if temp_file_path.exists():
-            temp_file_path.unlink()
-        
         if result["status"] == "success":
+            # Cached answers may be missing content from the new document
+            semantic_cache.clear()
             logger.info(f"Successfully uploaded: {file.filename}")
             return {
                 "message": f"{file.filename} uploaded and indexed successfully!",
@@ -139,6 +174,10 @@ async def upload_file(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"Error uploading {file.filename}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        # Clean up temporary file
+        if temp_file_path.exists():
+            temp_file_path.unlink()
 
 
 @app.post("/api/ask/")
@@ -151,9 +190,28 @@ async def ask_question(question: str = Form(...), top_k: int = Form(5)):
         raise HTTPException(status_code=500, detail="Qdrant store not initialized")
     
     try:
+        # Embedding, search, generation and the history write all block, so they
+        # run in the worker pool and concurrent questions don't queue on the loop
+        loop = asyncio.get_running_loop()
+        
+        # Answer paraphrased repeats straight from the semantic cache
+        query_embedding = await loop.run_in_executor(worker_pool, qdrant_store.embed_query, question)
+        cached = semantic_cache.lookup(query_embedding, top_k)
+        if cached is not None:
+            source_ids = [f"{s['filename']}_chunk_{s['chunk_index']}" for s in cached["sources"]]
+            await loop.run_in_executor(
+                worker_pool, chat_history.add_message, question, cached["answer"], source_ids
+            )
+            return JSONResponse(cached)
+        
         # Search Qdrant for top K similar chunks
         logger.info(f"Searching for top {top_k} chunks for query: {question[:50]}...")
-        hits = qdrant_store.search_similar_chunks(query=question, top_k=top_k)
+        hits = await loop.run_in_executor(worker_pool, partial(
+            qdrant_store.search_similar_chunks,
+            query=question,
+            top_k=top_k,
+            query_embedding=query_embedding
+        ))
         
         if not hits:
             logger.warning("No matching chunks found in Qdrant")
@@ -167,11 +225,14 @@ async def ask_question(question: str = Form(...), top_k: int = Form(5)):
         context_texts: List[str] = [hit["text"] for hit in hits]
         
         # Generate answer using Gemini (or mock)
-        answer = generate_answer_from_context(question, context_texts)
+        answer = await loop.run_in_executor(
+            worker_pool, generate_answer_from_context, question, context_texts
+        )
         
         # Format sources with filenames and chunk info
         sources = [
             {
+                "id": hit["id"],
                 "filename": hit["filename"],
                 "chunk_index": hit["chunk_index"],
                 "score": hit["score"]
@@ -181,20 +242,42 @@ async def ask_question(question: str = Form(...), top_k: int = Form(5)):
         
         # Save to chat history (save source filenames)
         source_ids = [f"{hit['filename']}_chunk_{hit['chunk_index']}" for hit in hits]
-        chat_history.add_message(question, answer, source_ids)
+        await loop.run_in_executor(worker_pool, chat_history.add_message, question, answer, source_ids)
         
         logger.info(f"Successfully answered query with {len(hits)} sources")
-        return JSONResponse({
+        response = {
             "answer": answer,
             "sources": sources,
             "chunks": [{"text": hit["text"][:200] + "...", "filename": hit["filename"]} for hit in hits[:3]]
-        })
+        }
+        # Don't cache failed generations (the Gemini helper returns them as text)
+        if not answer.startswith("Error generating answer"):
+            semantic_cache.add(query_embedding, top_k, response)
+        return JSONResponse(response)
     
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@app.get("/api/similar/{point_id}")
+def similar_chunks(point_id: str, top_k: int = 5):
+    """Find chunks similar to an already indexed chunk, without re-embedding it."""
+    if not qdrant_store:
+        raise HTTPException(status_code=500, detail="Qdrant store not initialized")
+    
+    try:
+        results = qdrant_store.recommend_similar_chunks(point_id=point_id, top_k=top_k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding similar chunks: {str(e)}")
+    if results is None:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+    return {
+        "chunks": results,
+        "total": len(results)
+    }
+
+
 @app.get("/api/documents/")
 def list_documents():
     """List all uploaded documents stored in Qdrant."""
@@ -217,17 +300,20 @@ def list_documents():
 
 
 # Chat History Endpoints
+# Reads are served from ChatHistory's in-memory cache, so they run directly on
+# the event loop; writes touch the log file and go to the worker pool.
 @app.get("/api/chat/history")
-def get_chat_history(limit: int = 20):
+async def get_chat_history(limit: int = 20):
     """Get recent chat history."""
     history = chat_history.get_history(limit=limit)
     return JSONResponse({"history": history, "count": len(history)})
 
 
 @app.delete("/api/chat/history")
-def clear_chat_history():
+async def clear_chat_history():
     """Clear all chat history."""
-    success = chat_history.clear_history()
+    loop = asyncio.get_running_loop()
+    success = await loop.run_in_executor(worker_pool, chat_history.clear_history)
     if success:
         return JSONResponse({"message": "Chat history cleared successfully"})
     else:
@@ -235,9 +321,10 @@ def clear_chat_history():
 
 
 @app.delete("/api/chat/message/{message_id}")
-def delete_message(message_id: str):
+async def delete_message(message_id: str):
     """Delete a specific message from history."""
-    success = chat_history.delete_message(message_id)
+    loop = asyncio.get_running_loop()
+    success = await loop.run_in_executor(worker_pool, chat_history.delete_message, message_id)
     if success:
         return JSONResponse({"message": "Message deleted successfully"})
     else:
@@ -245,7 +332,7 @@ def delete_message(message_id: str):
 
 
 @app.get("/api/chat/stats")
-def get_chat_stats():
+async def get_chat_stats():
     """Get chat history statistics."""
     stats = chat_history.get_stats()
     return JSONResponse(stats)
@@ -4,6 +4,8 @@ Stores and retrieves conversation history with timestamps
 """
 import json
 import os
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -13,37 +15,87 @@ logger = logging.getLogger(__name__)
 
 
 class ChatHistory:
-    """Manages chat history storage and retrieval."""
-    
+    """
+    Manages chat history storage and retrieval.
+
+    The recent messages live in memory; the file on disk is an append-only
+    JSONL log (one message or deletion marker per line) that is replayed at
+    startup and compacted once it grows well past the retained history.
+    """
+
     def __init__(self, storage_dir: Path):
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(exist_ok=True)
-        self.history_file = self.storage_dir / "chat_history.json"
+        self.history_file = self.storage_dir / "chat_history.jsonl"
+        self.legacy_history_file = self.storage_dir / "chat_history.json"
         self.max_messages = 50  # Store last 50 messages per session
-        self._ensure_history_file()
-    
-    def _ensure_history_file(self):
-        """Create history file if it doesn't exist."""
-        if not self.history_file.exists():
-            self._save_history([])
-    
+        self._lock = threading.Lock()
+        self._line_count = 0
+        self._log_damaged = False
+        self._cache = deque(self._load_history(), maxlen=self.max_messages)
+        if self._log_damaged:
+            # Don't append after a torn line; start from a clean log
+            self._rewrite_log(list(self._cache))
+
     def _load_history(self) -> List[Dict]:
-        """Load chat history from file."""
+        """Replay the history log from disk."""
+        if not self.history_file.exists():
+            return self._migrate_legacy_history()
+
+        history: Dict[str, Dict] = {}
         try:
             with open(self.history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Partial line from an interrupted write
+                        logger.warning("Skipping damaged line in chat history log")
+                        self._log_damaged = True
+                        continue
+                    self._line_count += 1
+                    if "deleted" in record:
+                        history.pop(record["deleted"], None)
+                    else:
+                        history[record["id"]] = record
         except Exception as e:
             logger.error(f"Error loading chat history: {e}")
-            return []
-    
-    def _save_history(self, history: List[Dict]):
-        """Save chat history to file."""
+        return list(history.values())[-self.max_messages:]
+
+    def _migrate_legacy_history(self) -> List[Dict]:
+        """Convert the old single-JSON history file into the JSONL log."""
+        history: List[Dict] = []
+        if self.legacy_history_file.exists():
+            try:
+                with open(self.legacy_history_file, 'r', encoding='utf-8') as f:
+                    history = json.load(f)[-self.max_messages:]
+            except Exception as e:
+                logger.error(f"Error loading legacy chat history: {e}")
+        self._rewrite_log(history)
+        return history
+
+    def _rewrite_log(self, history: List[Dict]):
+        """Atomically replace the log with one line per message."""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
+            tmp_file = self.history_file.with_suffix(".jsonl.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for msg in history:
+                    f.write(json.dumps(msg, ensure_ascii=False) + '\n')
+            os.replace(tmp_file, self.history_file)
+            self._line_count = len(history)
         except Exception as e:
             logger.error(f"Error saving chat history: {e}")
-    
+
+    def _append_record(self, record: Dict):
+        """Append a single record to the log, compacting it when it grows too long."""
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._line_count += 1
+        if self._line_count > 2 * self.max_messages:
+            self._rewrite_log(list(self._cache))
+
     def add_message(self, question: str, answer: str, sources: Optional[List[str]] = None) -> Dict:
         """Add a new Q&A pair to history."""
         message = {
@@ -53,58 +105,62 @@ class ChatHistory:
             "answer": answer,
             "sources": sources or []
         }
-        
-        history = self._load_history()
-        history.append(message)
-        
-        # Keep only last N messages
-        if len(history) > self.max_messages:
-            history = history[-self.max_messages:]
-        
-        self._save_history(history)
+
+        with self._lock:
+            # The deque keeps only the last N messages
+            self._cache.append(message)
+            try:
+                self._append_record(message)
+            except Exception as e:
+                logger.error(f"Error saving chat history: {e}")
         logger.info(f"Added message to history: {message['id']}")
         return message
-    
+
     def get_history(self, limit: int = 20) -> List[Dict]:
         """Get recent chat history (limited to last N messages)."""
-        history = self._load_history()
+        with self._lock:
+            history = list(self._cache)
         return history[-limit:] if limit else history
-    
+
     def clear_history(self) -> bool:
         """Clear all chat history."""
         try:
-            self._save_history([])
+            with self._lock:
+                self._cache.clear()
+                self._rewrite_log([])
             logger.info("Chat history cleared")
             return True
         except Exception as e:
             logger.error(f"Error clearing chat history: {e}")
             return False
-    
+
     def get_message_by_id(self, message_id: str) -> Optional[Dict]:
         """Get a specific message by ID."""
-        history = self._load_history()
-        for msg in history:
-            if msg.get("id") == message_id:
-                return msg
+        with self._lock:
+            for msg in self._cache:
+                if msg.get("id") == message_id:
+                    return msg
         return None
-    
+
     def delete_message(self, message_id: str) -> bool:
         """Delete a specific message from history."""
         try:
-            history = self._load_history()
-            history = [msg for msg in history if msg.get("id") != message_id]
-            self._save_history(history)
+            with self._lock:
+                remaining = [msg for msg in self._cache if msg.get("id") != message_id]
+                if len(remaining) != len(self._cache):
+                    self._cache = deque(remaining, maxlen=self.max_messages)
+                    self._append_record({"deleted": message_id})
             logger.info(f"Deleted message: {message_id}")
             return True
         except Exception as e:
             logger.error(f"Error deleting message: {e}")
             return False
-    
+
     def get_stats(self) -> Dict:
         """Get statistics about chat history."""
-        history = self._load_history()
-        return {
-            "total_messages": len(history),
-            "oldest_message": history[0]["timestamp"] if history else None,
-            "newest_message": history[-1]["timestamp"] if history else None
-        }
+        with self._lock:
+            return {
+                "total_messages": len(self._cache),
+                "oldest_message": self._cache[0]["timestamp"] if self._cache else None,
+                "newest_message": self._cache[-1]["timestamp"] if self._cache else None
+            }
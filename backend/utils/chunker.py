@@ -2,62 +2,106 @@
 Text chunking utilities for splitting large documents.
 """
 
+from bisect import bisect_right
 from typing import List
 import re
 
+# A sentence ends at '.', '!' or '?' followed by a space
+_SENTENCE_END_RE = re.compile(r'[.!?] ')
 
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+
+def _is_normalized(text: str) -> bool:
+    """Check whether text already has single spaces as its only whitespace."""
+    # isprintable() is False for every whitespace character except ' '
+    return (
+        text.isprintable()
+        and '  ' not in text
+        and not text.startswith(' ')
+        and not text.endswith(' ')
+    )
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    already_normalized: bool = False
+) -> List[str]:
     """
     Split text into overlapping chunks.
     
+    Chunks start every ``chunk_size - overlap`` characters (a fixed stride).
+    The end of each chunk is pulled back to a sentence or word boundary when
+    one exists, but never before the start of the next chunk, so no text is
+    skipped.
+    
     Args:
         text: The text to chunk
         chunk_size: Maximum size of each chunk (in characters)
         overlap: Number of characters to overlap between chunks
+        already_normalized: Skip the whitespace pass when the caller has already
+            collapsed whitespace runs to single spaces and stripped the text
         
     Returns:
         List of text chunks
     """
+    if overlap < 0 or overlap >= chunk_size:
+        raise ValueError("overlap must be non-negative and smaller than chunk_size")
+    
     if not text or len(text) == 0:
         return []
     
-    # Clean up excessive whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    # Clean up excessive whitespace (str.split/join runs entirely in C and
+    # is several times faster than re.sub on large documents). Text that is
+    # already clean (no tabs/newlines/other whitespace, no doubled or edge
+    # spaces) is left as is to avoid copying it.
+    if not already_normalized and not _is_normalized(text):
+        text = ' '.join(text.split())
+    if not text:
+        return []
     
     if len(text) <= chunk_size:
         return [text]
     
+    # Without overlap the boundary search can never move an end (the next
+    # chunk starts exactly there), so chunking reduces to plain slicing
+    if overlap == 0:
+        chunks = (text[i:i + chunk_size].strip() for i in range(0, len(text), chunk_size))
+        return [chunk for chunk in chunks if chunk]
+    
+    # Precompute boundary positions once; each chunk then needs only two
+    # binary searches instead of rescanning its window
+    sentence_ends = [m.start() for m in _SENTENCE_END_RE.finditer(text)]
+    spaces = [m.start() for m in re.finditer(' ', text)]
+    
+    stride = chunk_size - overlap
     chunks = []
-    start = 0
     
-    while start < len(text):
+    for start in range(0, len(text), stride):
         end = start + chunk_size
         
         # If this is not the last chunk, try to break at a sentence or word boundary
         if end < len(text):
-            # Look for sentence boundaries (., !, ?)
-            sentence_end = max(
-                text.rfind('. ', start, end),
-                text.rfind('! ', start, end),
-                text.rfind('? ', start, end)
-            )
+            # Earliest acceptable break: past the middle of the chunk and
+            # not before the next chunk starts
+            min_end = start + max(stride, chunk_size // 2 + 1)
             
-            if sentence_end > start + chunk_size // 2:  # Only break if we found a good spot
-                end = sentence_end + 1
+            # Last sentence boundary (., !, ?) whose trailing space fits before end
+            i = bisect_right(sentence_ends, end - 2) - 1
+            if i >= 0 and sentence_ends[i] + 1 >= min_end:
+                end = sentence_ends[i] + 1
             else:
                 # Fall back to word boundary
-                space_pos = text.rfind(' ', start, end)
-                if space_pos > start:
-                    end = space_pos
+                i = bisect_right(spaces, end - 1) - 1
+                if i >= 0 and spaces[i] >= min_end:
+                    end = spaces[i]
         
         chunk = text[start:end].strip()
         if chunk:
             chunks.append(chunk)
         
-        # Move start position, accounting for overlap
-        start = end - overlap
-        if start <= 0:
-            start = end
+        if end >= len(text):
+            break
     
     return chunks
 
@@ -1,60 +1,95 @@
 import os
-import hashlib
+import re
+import uuid
 from typing import List, Dict
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import (
+    VectorParams,
+    Distance,
+    Batch,
+    SearchRequest,
+    SearchParams,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType
+)
+
+from .chunker import chunk_text
+from .embeddings import get_embeddings, embed_query
 
 # ---------- Configuration ----------
 QDRANT_URL = os.getenv("QDRANT_URL", "https://4fd42f5a-a902-4b9e-b4b2-79f82eebf981.us-east4-0.gcp.cloud.qdrant.io")
 COLLECTION_NAME = "learnix_documents"
-EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 UPLOAD_FOLDER = "uploads"
 
 # ---------- Setup Clients ----------
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 qdrant = QdrantClient(url=QDRANT_URL)
-model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+_PAGE_NUMBER_RE = re.compile(r'\bPage\s*\d+\b', re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
 
 
 # ---------- Helper Functions ----------
 def clean_text(text: str) -> str:
     """Remove unwanted characters, page numbers, and formatting."""
-    import re
-    text = re.sub(r'\bPage\s*\d+\b', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _PAGE_NUMBER_RE.sub('', text)
+    text = _WS_RE.sub(' ', text).strip()
     return text
 
 
-def get_file_hash(filename: str) -> str:
-    """Generate unique hash for each file to avoid duplication."""
-    return hashlib.md5(filename.encode()).hexdigest()
-
-
 def ensure_collection_exists():
     """Create the Qdrant collection if not exists."""
     existing_collections = [c.name for c in qdrant.get_collections().collections]
     if COLLECTION_NAME not in existing_collections:
         qdrant.recreate_collection(
             collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE)
+            # Full FP32 vectors live on disk; INT8 copies stay in RAM for search
+            vectors_config=VectorParams(size=384, distance=Distance.COSINE, on_disk=True),
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
         )
 
 
+def extract_pdf_text(file_path: str) -> str:
+    """Extract text from a PDF, preferring pdfium (C++) over pure-Python PyPDF2."""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(file_path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page_texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(page_texts)
+    finally:
+        pdf.close()
+
+
 # ---------- Main Functions ----------
 
 def store_document(file_path: str, file_name: str):
     """Extract text, generate embeddings, and store them persistently."""
-    from PyPDF2 import PdfReader
-
     ensure_collection_exists()
 
     # 1. Extract text
     text = ""
     if file_path.endswith(".pdf"):
-        reader = PdfReader(file_path)
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        text = extract_pdf_text(file_path)
     else:
         with open(file_path, "r", encoding="utf-8") as f:
             text = f.read()
@@ -63,44 +98,74 @@ def store_document(file_path: str, file_name: str):
     if not text:
         return {"error": "No text found in document"}
 
-    # 2. Split text into chunks
-    chunk_size = 500
-    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    # 2. Split text into chunks (clean_text already normalized whitespace)
+    chunks = chunk_text(text, chunk_size=500, overlap=0, already_normalized=True)
 
-    # 3. Generate embeddings
-    embeddings = model.encode(chunks).tolist()
+    # 3. Generate embeddings (one batched encode for all chunks)
+    embeddings = get_embeddings(chunks).tolist()
 
-    # 4. Store in Qdrant
-    file_hash = get_file_hash(file_name)
-    points = [
-        PointStruct(
-            id=int(hashlib.md5(f"{file_hash}_{i}".encode()).hexdigest(), 16) % (10**12),
-            vector=embeddings[i],
-            payload={"text": chunks[i], "file": file_name}
-        )
-        for i in range(len(chunks))
-    ]
+    # 4. Store in Qdrant as one column-oriented batch (no per-point models)
+    # Deterministic UUIDs: re-uploading a file overwrites its previous points
+    batch = Batch(
+        ids=[str(uuid.uuid5(uuid.NAMESPACE_URL, f"{file_name}:{i}")) for i in range(len(chunks))],
+        vectors=embeddings,
+        payloads=[{"text": chunk, "file": file_name} for chunk in chunks]
+    )
 
-    qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
+    qdrant.upsert(collection_name=COLLECTION_NAME, points=batch)
 
     return {"message": f"Stored {len(chunks)} chunks from {file_name} successfully."}
 
 
+def _search_params(top_k: int) -> SearchParams:
+    """HNSW/quantization settings scaled to the number of results requested."""
+    # Scan the INT8 vectors for 2x top_k candidates, then rescore them with
+    # the full FP32 vectors so recall matches an unquantized search
+    return SearchParams(
+        hnsw_ef=max(64, top_k * 8),
+        exact=False,
+        quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+    )
+
+
 def retrieve_context(query: str, top_k: int = 3) -> List[str]:
     """Retrieve top matching chunks for a given query."""
     ensure_collection_exists()
-    query_vector = model.encode([query])[0].tolist()
+    query_vector = embed_query(query).tolist()
 
     results = qdrant.search(
         collection_name=COLLECTION_NAME,
         query_vector=query_vector,
-        limit=top_k
+        limit=top_k,
+        search_params=_search_params(top_k)
     )
 
     contexts = [r.payload["text"] for r in results if "text" in r.payload]
     return contexts
 
 
+def retrieve_contexts_batch(queries: List[str], top_k: int = 3) -> List[List[str]]:
+    """Retrieve top matching chunks for several queries in one Qdrant round trip."""
+    if not queries:
+        return []
+    ensure_collection_exists()
+    query_vectors = get_embeddings(queries, batch_size=32)
+
+    params = _search_params(top_k)
+    batch_results = qdrant.search_batch(
+        collection_name=COLLECTION_NAME,
+        requests=[
+            SearchRequest(vector=v.tolist(), limit=top_k, with_payload=True, params=params)
+            for v in query_vectors
+        ]
+    )
+
+    return [
+        [r.payload["text"] for r in results if "text" in r.payload]
+        for results in batch_results
+    ]
+
+
 def load_existing_documents() -> List[Dict]:
     """Check what documents already exist in the store."""
     ensure_collection_exists()
@@ -2,37 +2,56 @@
 Embeddings helper module.
 
 Uses sentence-transformers for generating embeddings with all-MiniLM-L6-v2 model.
+Set EMBEDDING_BACKEND=onnx to run an INT8-quantized ONNX export of the same
+model with ONNX Runtime instead (requires optimum and onnxruntime).
 """
 
 import os
 import numpy as np
 import logging
+from functools import lru_cache
+from typing import List
+
+from .model_pool import ModelPool
 
 logger = logging.getLogger(__name__)
 
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-
-_embedding_model = None
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers").lower()
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+# Each instance holds a full copy of the weights (~90 MB for MiniLM)
+EMBEDDING_POOL_SIZE = max(1, int(os.getenv("EMBEDDING_POOL_SIZE", "1")))
 
 
-def _load_model():
-    """Load the sentence-transformers model (lazy initialization)."""
-    global _embedding_model
-    
-    if _embedding_model is not None:
-        return _embedding_model
+def _create_model(index: int = 0):
+    """Load one instance of the configured embedding model."""
+    if EMBEDDING_BACKEND == "onnx":
+        try:
+            from .onnx_encoder import OnnxSentenceEncoder
+            logger.info(f"Loading ONNX embedding model: {EMBEDDING_MODEL}")
+            # Split the cores between the pool's sessions
+            return OnnxSentenceEncoder(
+                EMBEDDING_MODEL,
+                num_threads=max(1, (os.cpu_count() or 1) // EMBEDDING_POOL_SIZE)
+            )
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable, falling back to sentence-transformers: {e}")
     
     try:
         from sentence_transformers import SentenceTransformer
         logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
-        _embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+        model = SentenceTransformer(EMBEDDING_MODEL)
         logger.info("✅ Successfully loaded sentence-transformers model")
-        return _embedding_model
+        return model
     except Exception as e:
         logger.error(f"Error loading embedding model: {e}")
         raise RuntimeError(f"Failed to load embedding model: {e}")
 
 
+# Each encode checks out its own instance; extra copies load only when encodes overlap
+_model_pool = ModelPool(_create_model, EMBEDDING_POOL_SIZE)
+
+
 def get_embedding(text: str) -> np.ndarray:
     """
     Generate embedding for a text document.
@@ -47,17 +66,49 @@ def get_embedding(text: str) -> np.ndarray:
         # Return zero vector for empty text
         return np.zeros(384, dtype=np.float32)
     
-    model = _load_model()
-    embedding = model.encode([text])[0].astype(np.float32)
-    return embedding
+    return get_embeddings([text])[0]
+
+
+def get_embeddings(texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """
+    Generate embeddings for many texts with a single encode call.
+    
+    sentence-transformers sorts the inputs by length before batching and
+    restores the original order afterwards, so padding per batch stays small.
+    
+    Args:
+        texts: Input texts to embed
+        batch_size: Number of texts per forward pass
+        
+    Returns:
+        Numpy array of shape (len(texts), 384), one row per input text
+    """
+    if not texts:
+        return np.zeros((0, 384), dtype=np.float32)
+    
+    with _model_pool.checkout() as model:
+        embeddings = model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    return embeddings.astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _embed_query_cached(text: str) -> bytes:
+    """Embed a normalized query and return the raw float32 bytes (hashable, immutable)."""
+    return get_embedding(text).tobytes()
 
 
 def embed_query(text: str) -> np.ndarray:
     """
     Generate embedding for a query.
     
-    Same as get_embedding but kept as separate function for clarity
-    and potential future query-specific optimizations.
+    Embeddings are deterministic on the text, so repeated queries are served
+    from an in-process LRU cache instead of running the model again.
     
     Args:
         text: Query text to embed
@@ -65,15 +116,16 @@ def embed_query(text: str) -> np.ndarray:
     Returns:
         Numpy array of embedding vector (384 dimensions)
     """
-    return get_embedding(text)
+    cached = _embed_query_cached((text or "").strip())
+    return np.frombuffer(cached, dtype=np.float32).copy()
+
+
+# Allow callers to drop cached query embeddings (e.g. after switching models)
+embed_query.cache_clear = _embed_query_cached.cache_clear
+embed_query.cache_info = _embed_query_cached.cache_info
 
 
 def get_embedding_dimension() -> int:
     """Get the dimensionality of embeddings."""
-    model = _load_model()
-    if model:
-        # Get actual model dimension
+    with _model_pool.checkout() as model:
         return model.get_sentence_embedding_dimension()
-    else:
-        # Mock dimension
-        return 384
@@ -1,12 +1,57 @@
 import os
+import hashlib
 import logging
 import re
+import threading
+from collections import OrderedDict
 from typing import List
 
 logger = logging.getLogger(__name__)
 
 USE_MOCKS = os.getenv("USE_MOCKS", "1") == "1"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+# Answer post-processing patterns, compiled once at import
+_H2_BEFORE_RE = re.compile(r'(?<!\n)\n(##\s)')
+_H3_BEFORE_RE = re.compile(r'(?<!\n)\n(###\s)')
+_HEADING_AFTER_RE = re.compile(r'(##[^\n]+)\n(?!\n)')
+_BOLD_MARKER_BEFORE_RE = re.compile(r'(?<!\n)\n(\*\*[A-Z][^*]+\*\*:?\s*\n)')
+_BOLD_MARKER_AFTER_RE = re.compile(r'(\*\*[A-Z][^*]+\*\*:?\s*)\n(?!\n)')
+_LONG_PARAGRAPH_RE = re.compile(r'(\.\s+)([A-Z][^.]{50,})')
+_CODE_FENCE_BEFORE_RE = re.compile(r'(?<!\n)\n(```)')
+_CODE_FENCE_AFTER_RE = re.compile(r'(```)\n(?!\n)')
+_FIRST_BULLET_RE = re.compile(r'(?<!\n)\n(-\s)')
+_BULLET_HEADING_GAP_RE = re.compile(r'(\n-[^\n]+)\n\n(##)')
+_EXCESS_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# Formatted Gemini answers keyed by (question, retrieved contexts)
+_answer_cache: "OrderedDict[str, str]" = OrderedDict()
+_answer_cache_lock = threading.Lock()
+
+
+def _answer_cache_key(question: str, contexts: List[str]) -> str:
+    h = hashlib.blake2b(question.encode(), digest_size=16)
+    for ctx in contexts[:10]:
+        h.update(b"\x00")
+        h.update(ctx.encode())
+    return h.hexdigest()
+
+
+def _get_cached_answer(key: str):
+    with _answer_cache_lock:
+        answer = _answer_cache.get(key)
+        if answer is not None:
+            _answer_cache.move_to_end(key)
+        return answer
+
+
+def _cache_answer(key: str, answer: str):
+    with _answer_cache_lock:
+        _answer_cache[key] = answer
+        _answer_cache.move_to_end(key)
+        while len(_answer_cache) > ANSWER_CACHE_SIZE:
+            _answer_cache.popitem(last=False)
 
 
 def generate_answer_from_context(question: str, contexts: List[str]) -> str:
@@ -16,6 +61,35 @@ def generate_answer_from_context(question: str, contexts: List[str]) -> str:
         return _generate_gemini_answer(question, contexts)
 
 
+def _format_answer(answer: str) -> str:
+    """Normalize Markdown spacing in a generated answer."""
+    # 1. Ensure proper spacing around ## headings and ### subheadings
+    answer = _H2_BEFORE_RE.sub(r'\n\n\1', answer)  # blank line before ##
+    answer = _HEADING_AFTER_RE.sub(r'\1\n\n', answer)  # blank line after ## / ###
+    answer = _H3_BEFORE_RE.sub(r'\n\n\1', answer)  # blank line before ###
+
+    # 2. Ensure proper spacing around **bold section markers** (if AI uses this style)
+    answer = _BOLD_MARKER_BEFORE_RE.sub(r'\n\n\1', answer)  # blank line before
+    answer = _BOLD_MARKER_AFTER_RE.sub(r'\1\n\n', answer)  # blank line after
+
+    # 3. Break long paragraphs (add line break after sentences if paragraph is too long)
+    answer = _LONG_PARAGRAPH_RE.sub(r'.\n\n\2', answer)
+
+    # 4. Ensure proper spacing around code blocks
+    answer = _CODE_FENCE_BEFORE_RE.sub(r'\n\n\1', answer)  # blank line before code
+    answer = _CODE_FENCE_AFTER_RE.sub(r'\1\n\n', answer)  # blank line after code
+
+    # 5. Ensure proper spacing around bullet points
+    answer = _FIRST_BULLET_RE.sub(r'\n\n\1', answer, count=1)  # blank line before first bullet
+    answer = _BULLET_HEADING_GAP_RE.sub(r'\1\n\2', answer)  # remove extra space between bullets and next heading
+
+    # 6. Prevent excessive blank lines (max 2 newlines)
+    answer = _EXCESS_BLANK_LINES_RE.sub('\n\n', answer)
+
+    # 7. Clean up any remaining formatting issues
+    return answer.strip()
+
+
 def _generate_mock_answer(question: str, contexts: List[str]) -> str:
     if not contexts or all(not c.strip() for c in contexts):
         return f"🤖 Mock Answer: No relevant content found for '{question}'. Upload materials first!"
@@ -33,6 +107,13 @@ Based on the uploaded documents:
 
 
 def _generate_gemini_answer(question: str, contexts: List[str]) -> str:
+    # Same question over the same chunks: skip the API call and the reformatting
+    cache_key = _answer_cache_key(question, contexts)
+    cached = _get_cached_answer(cache_key)
+    if cached is not None:
+        logger.info("✅ Gemini answer served from cache")
+        return cached
+
     try:
         import google.generativeai as genai
 
@@ -149,36 +230,10 @@ Return ONLY the formatted Markdown response. Start directly with the first ## he
         answer = response.text.strip()
 
         # --- Enhanced Cleanup Formatting ---
-        # 1. Ensure proper spacing around ## headings
-        answer = re.sub(r'(?<!\n)\n(##\s)', r'\n\n\1', answer)  # blank line before ##
-        answer = re.sub(r'(##[^\n]+)\n(?!\n)', r'\1\n\n', answer)  # blank line after ##
-        
-        # 2. Ensure proper spacing around ### subheadings
-        answer = re.sub(r'(?<!\n)\n(###\s)', r'\n\n\1', answer)  # blank line before ###
-        answer = re.sub(r'(###[^\n]+)\n(?!\n)', r'\1\n\n', answer)  # blank line after ###
-        
-        # 3. Ensure proper spacing around **bold section markers** (if AI uses this style)
-        answer = re.sub(r'(?<!\n)\n(\*\*[A-Z][^*]+\*\*:?\s*\n)', r'\n\n\1', answer)  # blank line before
-        answer = re.sub(r'(\*\*[A-Z][^*]+\*\*:?\s*)\n(?!\n)', r'\1\n\n', answer)  # blank line after
-        
-        # 4. Break long paragraphs (add line break after sentences if paragraph is too long)
-        answer = re.sub(r'(\.\s+)([A-Z][^.]{50,})', r'.\n\n\2', answer)
-        
-        # 5. Ensure proper spacing around code blocks
-        answer = re.sub(r'(?<!\n)\n(```)', r'\n\n\1', answer)  # blank line before code
-        answer = re.sub(r'(```)\n(?!\n)', r'\1\n\n', answer)  # blank line after code
-        
-        # 6. Ensure proper spacing around bullet points
-        answer = re.sub(r'(?<!\n)\n(-\s)', r'\n\n\1', answer, count=1)  # blank line before first bullet
-        answer = re.sub(r'(\n-[^\n]+)\n\n(##)', r'\1\n\2', answer)  # remove extra space between bullets and next heading
-        
-        # 7. Prevent excessive blank lines (max 2 newlines)
-        answer = re.sub(r'\n{3,}', '\n\n', answer)
-        
-        # 8. Clean up any remaining formatting issues
-        answer = answer.strip()
+        answer = _format_answer(answer)
 
         logger.info("✅ Gemini answer generated with enhanced formatting")
+        _cache_answer(cache_key, answer)
         return answer
 
     except Exception as e:
@@ -6,13 +6,28 @@ text decoding if those packages aren't installed (for mock mode).
 
 Cleans extracted text to remove metadata, page numbers, and irrelevant content.
 """
-from typing import Optional
-from io import BytesIO
+from typing import Iterable, Iterator, Optional
+from io import BytesIO, StringIO
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+# Lines to skip, fused into one pattern so each line is scanned once
+_SKIP_PATTERNS = [
+    r'^\s*page\s+\d+',  # Page numbers
+    r'^\s*\d+\s*$',  # Standalone numbers
+    r'copyright\s+©',  # Copyright lines
+    r'isbn[:\s]*[\d\-]+',  # ISBN numbers
+    r'blind\s+folio',  # Publishing metadata
+    r'compref',  # Reference codes
+    r'^\s*\d{2}[-/]\d{2}[-/]\d{2,4}',  # Dates at line start
+    r'^\s*chapter\s+\d+\s*$',  # Standalone chapter markers
+    r'^\s*section\s+\d+\s*$',  # Standalone section markers
+]
+_SKIP_RE = re.compile("|".join(f"(?:{p})" for p in _SKIP_PATTERNS), re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+
 
 def clean_text(text: str) -> str:
     """
@@ -24,19 +39,6 @@ def clean_text(text: str) -> str:
     lines = text.split('\n')
     cleaned_lines = []
     
-    # Patterns to skip
-    skip_patterns = [
-        r'^\s*page\s+\d+',  # Page numbers
-        r'^\s*\d+\s*$',  # Standalone numbers
-        r'copyright\s+©',  # Copyright lines
-        r'isbn[:\s]*[\d\-]+',  # ISBN numbers
-        r'blind\s+folio',  # Publishing metadata
-        r'compref',  # Reference codes
-        r'^\s*\d{2}[-/]\d{2}[-/]\d{2,4}',  # Dates at line start
-        r'^\s*chapter\s+\d+\s*$',  # Standalone chapter markers
-        r'^\s*section\s+\d+\s*$',  # Standalone section markers
-    ]
-    
     for line in lines:
         line = line.strip()
         
@@ -45,7 +47,7 @@ def clean_text(text: str) -> str:
             continue
         
         # Skip lines matching patterns
-        if any(re.search(pattern, line, re.IGNORECASE) for pattern in skip_patterns):
+        if _SKIP_RE.search(line):
             continue
         
         # Skip lines that are too short (likely artifacts)
@@ -56,7 +58,7 @@ def clean_text(text: str) -> str:
     
     # Join with spaces and normalize whitespace
     cleaned = ' '.join(cleaned_lines)
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = _WS_RE.sub(' ', cleaned)
     
     return cleaned.strip()
 
@@ -77,7 +79,8 @@ def process_file(filename: str, file_content: bytes) -> str:
     
     try:
         if filename_lower.endswith(".pdf"):
-            text = _process_pdf(file_content)
+            # Clean page by page so the raw text of the whole PDF is never held at once
+            return _clean_pages(_process_pdf(file_content))
         elif filename_lower.endswith(".docx"):
             text = _process_docx(file_content)
         elif filename_lower.endswith((".txt", ".md")):
@@ -98,23 +101,37 @@ def process_file(filename: str, file_content: bytes) -> str:
     return clean_text(text)
 
 
-def _process_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file."""
+def _clean_pages(pages: Iterable[str]) -> str:
+    """
+    Clean text page by page and join the results.
+    
+    Equivalent to clean_text("\n".join(pages)) since cleaning works line by
+    line, but only one raw page is held in memory at a time.
+    """
+    cleaned = StringIO()
+    for page_text in pages:
+        page_text = clean_text(page_text)
+        if page_text:
+            if cleaned.tell():
+                cleaned.write(' ')
+            cleaned.write(page_text)
+    return cleaned.getvalue()
+
+
+def _process_pdf(file_content: bytes) -> Iterator[str]:
+    """Extract text from PDF file, yielding one page at a time."""
     try:
         from PyPDF2 import PdfReader
         reader = PdfReader(BytesIO(file_content))
-        text_parts = []
         for page in reader.pages:
             page_text = page.extract_text()
             if page_text:
-                text_parts.append(page_text)
-        return "\n".join(text_parts)
+                yield page_text
     except ImportError:
         logger.warning("PyPDF2 not installed. Install it for PDF support: pip install PyPDF2")
-        return "[PDF content - PyPDF2 not installed]"
+        yield "[PDF content - PyPDF2 not installed]"
     except Exception as e:
         logger.error(f"Error extracting PDF: {e}")
-        return ""
 
 
 def _process_docx(file_content: bytes) -> str:
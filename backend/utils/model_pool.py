@@ -0,0 +1,67 @@
+"""
+Pool of embedding model instances.
+
+Tokenizers and models are not safe to call from several threads at once, so
+each caller checks out an instance for the duration of its encode and puts
+it back afterwards. Instances are created lazily: a second copy is only
+loaded when two callers actually overlap.
+"""
+
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPool:
+    """Lazily-filled pool that hands each caller its own model instance."""
+
+    def __init__(self, factory: Callable[[int], Any], size: int = 1):
+        """
+        Initialize an empty pool.
+
+        Args:
+            factory: Called with the index of the instance to create (0 for
+                the first) and returns a new model
+            size: Maximum number of instances (each one holds a full copy of
+                the weights)
+        """
+        self.size = max(1, size)
+        self._factory = factory
+        self._idle: List[Any] = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """Borrow a model for the duration of the with block."""
+        model = self._acquire()
+        try:
+            yield model
+        finally:
+            with self._cond:
+                self._idle.append(model)
+                self._cond.notify()
+
+    def _acquire(self):
+        """Take an idle model, create one if the pool isn't full, or wait for one."""
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            index = self._created
+            self._created += 1
+
+        # Load outside the lock so idle models can still be handed out meanwhile
+        try:
+            if index:
+                logger.info(f"Loading embedding model instance {index + 1} of {self.size}")
+            return self._factory(index)
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
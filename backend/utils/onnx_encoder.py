@@ -0,0 +1,139 @@
+"""
+ONNX Runtime sentence encoder.
+
+Drop-in replacement for SentenceTransformer.encode() that runs an INT8
+dynamically quantized ONNX export of the model on CPU. Pooling matches
+sentence-transformers (attention-masked mean pooling, optional L2 norm).
+
+The export is done once with optimum and cached on disk; later loads only
+need onnxruntime and the tokenizer.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "learnix" / "onnx"
+
+
+class OnnxSentenceEncoder:
+    """Mean-pooled transformer embeddings computed with ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[Path] = None,
+        quantize: bool = True,
+        max_seq_length: int = 256,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Load (exporting on first use) an ONNX version of a sentence-transformers model.
+
+        Args:
+            model_name: Hugging Face model name, e.g. sentence-transformers/all-MiniLM-L6-v2
+            cache_dir: Directory for exported models (default ~/.cache/learnix/onnx)
+            quantize: Use INT8 dynamic quantization for the weights
+            max_seq_length: Maximum number of tokens per text
+            num_threads: ONNX Runtime intra-op threads (default: all cores)
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        cache_dir = Path(cache_dir or os.getenv("ONNX_CACHE_DIR", DEFAULT_CACHE_DIR))
+        export_dir = cache_dir / model_name.replace("/", "--")
+        model_path = export_dir / ("model_int8.onnx" if quantize else "model.onnx")
+        if not model_path.exists():
+            self._export(model_name, export_dir, quantize)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(export_dir))
+        self.max_seq_length = max_seq_length
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dim = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"✅ Loaded ONNX encoder from {model_path}")
+
+    @staticmethod
+    def _export(model_name: str, export_dir: Path, quantize: bool):
+        """Export the model to ONNX and optionally quantize it to INT8."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(str(export_dir))
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(str(export_dir))
+
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            logger.info("Quantizing ONNX model weights to INT8")
+            quantize_dynamic(
+                str(export_dir / "model.onnx"),
+                str(export_dir / "model_int8.onnx"),
+                weight_type=QuantType.QInt8
+            )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the dimensionality of embeddings."""
+        return self._dim
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Embed one text or a list of texts.
+
+        Accepts (and ignores) the other SentenceTransformer.encode() keyword
+        arguments such as convert_to_numpy and show_progress_bar.
+
+        Args:
+            sentences: Text or list of texts
+            batch_size: Number of texts per forward pass
+            normalize_embeddings: L2-normalize the output vectors
+
+        Returns:
+            Array of shape (dim,) for a single text, else (len(sentences), dim)
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.zeros((len(sentences), self._dim), dtype=np.float32)
+        # Longest first, like sentence-transformers, so each batch pads little
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [sentences[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {k: v.astype(np.int64) for k, v in tokens.items() if k in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            embeddings[idx] = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings[0] if single else embeddings
@@ -8,25 +8,56 @@ Handles all Qdrant operations including:
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 import hashlib
 import logging
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
+import httpx
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     VectorParams,
     Distance,
-    PointStruct,
+    Batch,
     Filter,
+    FilterSelector,
     FieldCondition,
+    OptimizersConfigDiff,
+    SearchParams,
+    QuantizationSearchParams,
+    PayloadSchemaType,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
     MatchValue
 )
+
+from .model_pool import ModelPool
+
 # Defer importing heavy ML packages until needed to avoid import-time
 # failures when the system Python env has incompatible versions.
 
 logger = logging.getLogger(__name__)
 
+# Let OpenMP/MKL use every core; only takes effect if set before torch is imported
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 4))
+os.environ.setdefault("MKL_NUM_THREADS", os.environ["OMP_NUM_THREADS"])
+
+# Namespace for deterministic chunk IDs (UUID5); parsed once at import
+_CHUNK_NS = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # ISO OID namespace
+
+# Keep connections open between requests so each call doesn't pay for a new
+# TCP/TLS handshake (qdrant-client disables REST keep-alive for localhost)
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+_GRPC_OPTIONS = {"grpc.keepalive_time_ms": 30000}
+
+# Points sent per upsert request when uploading chunks
+UPLOAD_BATCH_SIZE = 256
+
 
 class QdrantStore:
     """Manages Qdrant vector database operations for document chunks."""
@@ -36,7 +67,13 @@ class QdrantStore:
         url: str,
         api_key: Optional[str] = None,
         collection_name: str = "learnix_documents",
-        embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_backend: str = "sentence-transformers",
+        upload_parallel: int = 4,
+        bulk_indexing_threshold: int = 20000,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        embedding_pool_size: int = 1
     ):
         """
         Initialize Qdrant client and embedding model.
@@ -46,27 +83,83 @@ class QdrantStore:
             api_key: Qdrant API key (optional for local deployment)
             collection_name: Name of the Qdrant collection
             embedding_model_name: Name of the SentenceTransformer model
+            embedding_backend: "sentence-transformers", or "onnx" to run an
+                INT8-quantized ONNX export of the model with ONNX Runtime
+            upload_parallel: Number of upsert requests in flight at once while
+                uploading chunks (1 = one batch after another)
+            bulk_indexing_threshold: indexing_threshold (KB) restored after a bulk upload
+            prefer_grpc: Talk to Qdrant over gRPC, falling back to HTTP if that fails
+            grpc_port: Qdrant gRPC port
+            embedding_pool_size: Maximum number of model instances; each encode
+                checks one out, and extra copies are only loaded when encodes overlap
         """
         self.collection_name = collection_name
+        self.upload_parallel = max(1, upload_parallel)
+        self.bulk_indexing_threshold = bulk_indexing_threshold
+        # Indexing is paused for the whole collection, so it is only resumed
+        # once the last of several concurrent bulk uploads has finished
+        self._bulk_uploads = 0
+        self._bulk_lock = threading.Lock()
         self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
         
         # Initialize Qdrant client
         logger.info(f"Connecting to Qdrant at {url}")
-        self.client = QdrantClient(
-            url=url,
-            api_key=api_key,
-            timeout=60
-        )
+        self.client = self._connect(url, api_key, prefer_grpc, grpc_port)
         
         # Defer loading the embedding model until first use to avoid heavy downloads at startup
         logger.info(f"Deferring embedding model load for: {embedding_model_name}")
         os.environ.setdefault("SENTENCE_TRANSFORMERS_HOME", str(Path.home() / ".cache" / "sentence_transformers"))
         self.embedding_model = None
         self.embedding_model_name = embedding_model_name
+        self.embedding_backend = embedding_backend.lower()
+        # embedding_model is the pool's first instance; a model assigned to it
+        # before first use is reused instead of loading another copy
+        self._models = ModelPool(self._create_embedding_model, embedding_pool_size)
+        
+        # Per-instance cache of query embeddings (tuples, so callers can't mutate them)
+        self._embed_query_cached = lru_cache(maxsize=1024)(
+            lambda query: tuple(self._encode_batch([query])[0].tolist())
+        )
+        
+        # Known filenames, seeded from Qdrant on first list_documents() and
+        # kept current by upsert_chunks()/delete_document_chunks(). Until it is
+        # seeded, those record their changes (True = added, False = deleted)
+        # so uploads and deletes that race with the seeding scroll aren't lost
+        self._filenames: Optional[set] = None
+        self._pending_filenames: Dict[str, bool] = {}
+        self._filenames_lock = threading.Lock()
         
         # Ensure collection exists
         self._ensure_collection_exists()
     
+    @staticmethod
+    def _connect(url: str, api_key: Optional[str], prefer_grpc: bool, grpc_port: int) -> QdrantClient:
+        """Create the Qdrant client, using gRPC when it is preferred and reachable."""
+        if prefer_grpc:
+            try:
+                client = QdrantClient(
+                    url=url,
+                    api_key=api_key,
+                    timeout=60,
+                    prefer_grpc=True,
+                    grpc_port=grpc_port,
+                    grpc_options=_GRPC_OPTIONS,
+                    limits=_HTTP_LIMITS
+                )
+                # The gRPC channel connects lazily; make one call to be sure it works
+                client.get_collections()
+                logger.info(f"✅ Using gRPC transport (port {grpc_port})")
+                return client
+            except Exception as e:
+                logger.warning(f"gRPC connection failed, falling back to HTTP: {e}")
+        
+        return QdrantClient(
+            url=url,
+            api_key=api_key,
+            timeout=60,
+            limits=_HTTP_LIMITS
+        )
+    
     def _ensure_collection_exists(self):
         """Create the Qdrant collection if it doesn't exist."""
         try:
@@ -82,13 +175,72 @@ class QdrantStore:
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.embedding_dim,
-                        distance=Distance.COSINE
+                        # Embeddings are L2-normalized at encode time, so a plain
+                        # dot product equals cosine similarity without the
+                        # server re-normalizing every vector
+                        distance=Distance.DOT,
+                        on_disk=True
+                    ),
+                    # INT8 copies of the vectors stay in RAM for HNSW traversal;
+                    # the FP32 originals live on disk and are used for rescoring
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
                     )
                 )
                 logger.info(f"✅ Created collection '{self.collection_name}'")
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {e}")
             raise
+        
+        # Index filename so filtered searches and deletes don't scan every point
+        # (creating an index that already exists is a no-op)
+        try:
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="filename",
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+        except Exception as e:
+            logger.warning(f"Could not create payload index on 'filename': {e}")
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed many texts with a single encode call.
+        
+        Texts are encoded sorted by length to keep padding small. Empty or
+        whitespace-only texts are not sent to the model; they get a zero
+        vector in the output instead.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            C-contiguous float32 array of shape (len(texts), embedding_dim),
+            one row per input text
+        """
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        keep = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not keep:
+            return embeddings
+        
+        # Encode in order of length so each batch pads to similar lengths.
+        # Done here rather than relying on the encoder, since not every
+        # backend sorts its inputs; fancy indexing puts rows back in place.
+        order = np.asarray(keep)[np.argsort([len(texts[i]) for i in keep], kind="stable")]
+        with self._models.checkout() as model:
+            encoded = model.encode(
+                [texts[i] for i in order],
+                batch_size=32,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        embeddings[order] = encoded
+        return embeddings
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -98,25 +250,71 @@ class QdrantStore:
             text: Input text
             
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as list of floats (all zeros for empty text)
+        """
+        return self._encode_batch([text])[0].tolist()
+    
+    def embed_query(self, query: str) -> List[float]:
         """
-        if not text or not text.strip():
-            # Return zero vector for empty text
+        Generate embedding vector for a search query.
+        
+        Repeated queries are served from an in-process LRU cache instead of
+        running the model again.
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Embedding vector as list of floats (all zeros for empty text)
+        """
+        if not query or not query.strip():
             return [0.0] * self.embedding_dim
+        return list(self._embed_query_cached(query))
+    
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for many texts in a single encode call.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            List of embedding vectors, in the same order as the input
+        """
+        return self._encode_batch(texts).tolist()
+    
+    def _create_embedding_model(self, index: int):
+        """Load one instance of the embedding model for the pool (index 0 is embedding_model)."""
+        if index == 0 and self.embedding_model is not None:
+            return self.embedding_model
         
-        # Lazy-load the embedding model if needed
-        if self.embedding_model is None:
+        model = None
+        if self.embedding_backend == "onnx":
+            try:
+                from .onnx_encoder import OnnxSentenceEncoder
+                logger.info(f"Loading ONNX embedding model now: {self.embedding_model_name}")
+                # Each session gets its share of the cores, so a full pool doesn't oversubscribe
+                model = OnnxSentenceEncoder(
+                    self.embedding_model_name,
+                    num_threads=max(1, (os.cpu_count() or 4) // self._models.size)
+                )
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable, falling back to sentence-transformers: {e}")
+        if model is None:
             try:
                 logger.info(f"Loading embedding model now: {self.embedding_model_name}")
                 # Import locally to avoid import-time dependency problems
+                import torch
                 from sentence_transformers import SentenceTransformer
-                self.embedding_model = SentenceTransformer(self.embedding_model_name, device='cpu')
+                torch.set_num_threads(int(os.getenv("LEARNIX_TORCH_THREADS", os.cpu_count() or 4)))
+                model = SentenceTransformer(self.embedding_model_name, device='cpu')
             except Exception as e:
                 logger.error(f"Failed to load embedding model: {e}")
                 raise RuntimeError(f"Embedding model load failed: {e}")
-
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        
+        if index == 0:
+            self.embedding_model = model
+        return model
     
     def generate_chunk_id(self, filename: str, chunk_index: int) -> str:
         """
@@ -130,16 +328,14 @@ class QdrantStore:
             Unique chunk ID as UUID string
         """
         # Create a deterministic UUID based on filename and chunk index
-        content = f"{filename}_{chunk_index}"
-        # Use UUID5 with a namespace for deterministic generation
-        namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # ISO OID namespace
-        return str(uuid.uuid5(namespace, content))
+        return str(uuid.uuid5(_CHUNK_NS, f"{filename}_{chunk_index}"))
     
     def upsert_chunks(
         self,
         chunks: List[str],
         filename: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        bulk: bool = False
     ) -> Dict:
         """
         Store document chunks with embeddings in Qdrant.
@@ -148,6 +344,8 @@ class QdrantStore:
             chunks: List of text chunks
             filename: Original filename
             metadata: Optional additional metadata
+            bulk: Pause HNSW indexing while uploading (for large documents);
+                the index is built once afterwards instead of incrementally
             
         Returns:
             Dictionary with status and count
@@ -156,45 +354,37 @@ class QdrantStore:
             return {"status": "error", "message": "No chunks provided", "count": 0}
         
         try:
-            points = []
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = self.generate_embedding(chunk)
-                
-                # Create point ID
-                point_id = self.generate_chunk_id(filename, i)
-                
-                # Create payload
-                payload = {
+            # Embed all chunks in one batched forward pass
+            embeddings = self._encode_batch(chunks)
+            
+            total_chunks = len(chunks)
+            ids = [self.generate_chunk_id(filename, i) for i in range(total_chunks)]
+            payloads = [
+                {
                     "text": chunk,
                     "filename": filename,
                     "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": total_chunks,
+                    **(metadata or {})
                 }
-                
-                # Add any additional metadata
-                if metadata:
-                    payload.update(metadata)
-                
-                # Create point
-                point = PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload=payload
-                )
-                points.append(point)
+                for i, chunk in enumerate(chunks)
+            ]
             
-            # Upsert all points to Qdrant
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
+            if bulk:
+                self._begin_bulk_upload()
+            try:
+                self._upload_batches(ids, embeddings, payloads)
+            finally:
+                if bulk:
+                    self._end_bulk_upload()
             
-            logger.info(f"✅ Upserted {len(points)} chunks from {filename} to Qdrant")
+            self._record_filename(filename, True)
+            
+            logger.info(f"✅ Upserted {total_chunks} chunks from {filename} to Qdrant")
             return {
                 "status": "success",
-                "message": f"Stored {len(points)} chunks",
-                "count": len(points)
+                "message": f"Stored {total_chunks} chunks",
+                "count": total_chunks
             }
         
         except Exception as e:
@@ -205,11 +395,68 @@ class QdrantStore:
                 "count": 0
             }
     
+    def _upload_batches(self, ids: List[str], embeddings: np.ndarray, payloads: List[Dict]):
+        """
+        Upsert points in batches of UPLOAD_BATCH_SIZE, up to upload_parallel at a time.
+        
+        Each batch is sent with wait=True, so the chunks are searchable when
+        this returns; the first failed batch's exception is re-raised.
+        """
+        def upsert(start: int):
+            end = start + UPLOAD_BATCH_SIZE
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=Batch(
+                    ids=ids[start:end],
+                    vectors=embeddings[start:end].tolist(),
+                    payloads=payloads[start:end]
+                ),
+                wait=True
+            )
+        
+        starts = range(0, len(ids), UPLOAD_BATCH_SIZE)
+        workers = min(self.upload_parallel, len(starts))
+        if workers <= 1:
+            for start in starts:
+                upsert(start)
+            return
+        
+        # The client is thread-safe and keeps a pool of connections, so while
+        # one batch is being indexed by the server the next is already in transit
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(upsert, start) for start in starts]:
+                future.result()
+    
+    def _begin_bulk_upload(self):
+        """Pause HNSW indexing if this is the only bulk upload in progress."""
+        with self._bulk_lock:
+            self._bulk_uploads += 1
+            if self._bulk_uploads == 1:
+                self._set_indexing_threshold(0)
+    
+    def _end_bulk_upload(self):
+        """Resume HNSW indexing once no bulk upload is in progress."""
+        with self._bulk_lock:
+            self._bulk_uploads -= 1
+            if self._bulk_uploads == 0:
+                self._set_indexing_threshold(self.bulk_indexing_threshold)
+    
+    def _set_indexing_threshold(self, threshold: int):
+        """Change the collection's HNSW indexing threshold (0 disables indexing)."""
+        try:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizer_config=OptimizersConfigDiff(indexing_threshold=threshold)
+            )
+        except Exception as e:
+            logger.warning(f"Could not set indexing_threshold={threshold}: {e}")
+    
     def search_similar_chunks(
         self,
         query: str,
         top_k: int = 5,
-        filename_filter: Optional[str] = None
+        filename_filter: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Search for similar chunks using semantic similarity.
@@ -218,13 +465,15 @@ class QdrantStore:
             query: Search query text
             top_k: Number of results to return
             filename_filter: Optional filename to filter results
+            query_embedding: Precomputed embedding of the query (skips encoding)
             
         Returns:
             List of dictionaries with chunk text and metadata
         """
         try:
-            # Generate query embedding
-            query_embedding = self.generate_embedding(query)
+            # Generate query embedding unless the caller already has it
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             
             # Prepare filter if filename is specified
             query_filter = None
@@ -243,19 +492,15 @@ class QdrantStore:
                 collection_name=self.collection_name,
                 query_vector=query_embedding,
                 limit=top_k,
-                query_filter=query_filter
+                query_filter=query_filter,
+                # Search the INT8 vectors for 2x candidates, then rescore them
+                # with the originals (ignored if the collection isn't quantized)
+                search_params=SearchParams(
+                    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+                )
             )
             
-            # Format results
-            results = []
-            for hit in search_results:
-                results.append({
-                    "text": hit.payload.get("text", ""),
-                    "filename": hit.payload.get("filename", ""),
-                    "chunk_index": hit.payload.get("chunk_index", 0),
-                    "score": float(hit.score)
-                })
-            
+            results = self._format_hits(search_results)
             logger.info(f"Found {len(results)} similar chunks for query")
             return results
         
@@ -263,29 +508,96 @@ class QdrantStore:
             logger.error(f"Error searching Qdrant: {e}")
             return []
     
-    def delete_document_chunks(self, filename: str) -> bool:
+    def recommend_similar_chunks(self, point_id: str, top_k: int = 5) -> Optional[List[Dict]]:
+        """
+        Find chunks similar to a chunk that is already stored.
+        
+        Qdrant looks up the stored vector server-side, so nothing is
+        embedded and no vector is sent over the network.
+        
+        Args:
+            point_id: ID of the stored chunk (see generate_chunk_id)
+            top_k: Number of results to return
+            
+        Returns:
+            List of dictionaries with chunk text and metadata, or None if no
+            chunk has that ID
+            
+        Raises:
+            Exception: Any other Qdrant error
+        """
+        try:
+            # Chunk IDs are UUIDs; anything else can't name a stored chunk
+            uuid.UUID(point_id)
+        except ValueError:
+            return None
+        
+        try:
+            recommend_results = self.client.recommend(
+                collection_name=self.collection_name,
+                positive=[point_id],
+                limit=top_k
+            )
+        except Exception as e:
+            # Only pay for the lookup on failure: a missing point is not an error
+            if not self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[point_id],
+                with_payload=False
+            ):
+                return None
+            logger.error(f"Error getting recommendations from Qdrant: {e}")
+            raise
+        
+        results = self._format_hits(recommend_results)
+        logger.info(f"Found {len(results)} chunks similar to {point_id}")
+        return results
+    
+    @staticmethod
+    def _format_hits(hits) -> List[Dict]:
+        """Convert Qdrant scored points into result dictionaries."""
+        results = []
+        for hit in hits:
+            results.append({
+                "id": str(hit.id),
+                "text": hit.payload.get("text", ""),
+                "filename": hit.payload.get("filename", ""),
+                "chunk_index": hit.payload.get("chunk_index", 0),
+                "score": float(hit.score)
+            })
+        return results
+    
+    def delete_document_chunks(self, filename: str, wait: bool = True) -> bool:
         """
         Delete all chunks for a specific document.
         
         Args:
             filename: Name of the file to delete chunks for
+            wait: Wait for the deletion to be applied; with False the call
+                returns once Qdrant has queued it (later operations on the
+                collection still see it applied)
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Delete points by filtering on filename
+            # Delete points by filtering on filename (resolved through the
+            # payload index created in _ensure_collection_exists)
             self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="filename",
-                            match=MatchValue(value=filename)
-                        )
-                    ]
-                )
+                points_selector=FilterSelector(
+                    filter=Filter(
+                        must=[
+                            FieldCondition(
+                                key="filename",
+                                match=MatchValue(value=filename)
+                            )
+                        ]
+                    )
+                ),
+                wait=wait
             )
+            self._record_filename(filename, False)
             logger.info(f"✅ Deleted all chunks for {filename}")
             return True
         except Exception as e:
@@ -311,24 +623,39 @@ class QdrantStore:
             logger.error(f"Error getting collection info: {e}")
             return {"error": str(e)}
     
+    def _record_filename(self, filename: str, present: bool):
+        """Update the filename cache, or queue the change if it isn't seeded yet."""
+        with self._filenames_lock:
+            if self._filenames is None:
+                self._pending_filenames[filename] = present
+            elif present:
+                self._filenames.add(filename)
+            else:
+                self._filenames.discard(filename)
+    
     def list_documents(self) -> List[str]:
         """
         Get list of unique filenames stored in the collection.
         
+        The collection is only scanned on the first call; after that the
+        cached set is kept up to date as documents are added and deleted.
+        
         Returns:
             List of unique filenames
         """
+        with self._filenames_lock:
+            if self._filenames is not None:
+                return sorted(self._filenames)
+        
         try:
-            # Scroll through all points to get unique filenames
-            # This is a simple implementation; for large collections,
-            # consider using aggregations or maintaining a separate index
+            # Scroll through all points once to get unique filenames
             offset = None
             filenames = set()
             
             while True:
                 records, next_offset = self.client.scroll(
                     collection_name=self.collection_name,
-                    limit=100,
+                    limit=1000,
                     offset=offset,
                     with_payload=["filename"],
                     with_vectors=False
@@ -342,16 +669,31 @@ class QdrantStore:
                     break
                 offset = next_offset
             
-            return sorted(list(filenames))
+            with self._filenames_lock:
+                # Another caller may have seeded the set while this one was scanning
+                if self._filenames is None:
+                    # Apply uploads/deletes that finished before or during the scan
+                    # (the scan may or may not have seen them)
+                    for name, present in self._pending_filenames.items():
+                        if present:
+                            filenames.add(name)
+                        else:
+                            filenames.discard(name)
+                    self._pending_filenames.clear()
+                    self._filenames = filenames
+                return sorted(self._filenames)
         except Exception as e:
             logger.error(f"Error listing documents: {e}")
             return []
 
 
-def create_qdrant_store() -> Optional[QdrantStore]:
+def create_qdrant_store(prefer_grpc: Optional[bool] = None) -> Optional[QdrantStore]:
     """
     Factory function to create QdrantStore from environment variables.
     
+    Args:
+        prefer_grpc: Use gRPC transport (default: QDRANT_PREFER_GRPC, on unless disabled)
+    
     Returns:
         QdrantStore instance or None if configuration is missing
     """
@@ -359,6 +701,13 @@ def create_qdrant_store() -> Optional[QdrantStore]:
     api_key = os.getenv("QDRANT_API_KEY")
     collection_name = os.getenv("QDRANT_COLLECTION", "learnix_documents")
     embedding_model = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    embedding_backend = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+    upload_parallel = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "4"))
+    bulk_indexing_threshold = int(os.getenv("QDRANT_BULK_INDEXING_THRESHOLD", "20000"))
+    if prefer_grpc is None:
+        prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "true").lower() in ("1", "true", "yes")
+    grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    embedding_pool_size = int(os.getenv("EMBEDDING_POOL_SIZE", "1"))
     
     if not url:
         logger.error("QDRANT_URL not set in environment variables")
@@ -369,7 +718,13 @@ def create_qdrant_store() -> Optional[QdrantStore]:
             url=url,
             api_key=api_key,
             collection_name=collection_name,
-            embedding_model_name=embedding_model
+            embedding_model_name=embedding_model,
+            embedding_backend=embedding_backend,
+            upload_parallel=upload_parallel,
+            bulk_indexing_threshold=bulk_indexing_threshold,
+            prefer_grpc=prefer_grpc,
+            grpc_port=grpc_port,
+            embedding_pool_size=embedding_pool_size
         )
         return store
     except Exception as e:
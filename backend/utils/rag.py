@@ -11,6 +11,54 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Optional: numba fuses scoring and top-k selection for very large indexes
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# Use the fused kernel above this many documents (below it BLAS + argpartition wins)
+NUMBA_MIN_DOCS = 50000
+
+_NO_SCORE = np.finfo(np.float32).min
+
+
+def _topk_dot_kernel(embs: np.ndarray, q: np.ndarray, k: int, n_blocks: int):
+    """
+    Top-k dot products without materializing the full score vector.
+    
+    Rows are split into blocks scanned in parallel; each block keeps its own
+    sorted top-k. Returns the (n_blocks * k) candidate indices and scores,
+    with -1 marking unused slots.
+    """
+    n, d = embs.shape
+    block = (n + n_blocks - 1) // n_blocks
+    cand_idx = np.full((n_blocks, k), -1, dtype=np.int64)
+    cand_val = np.full((n_blocks, k), _NO_SCORE, dtype=np.float32)
+    
+    for b in prange(n_blocks):
+        vals = cand_val[b]
+        idx = cand_idx[b]
+        for i in range(b * block, min(n, (b + 1) * block)):
+            score = np.float32(0.0)
+            for j in range(d):
+                score += embs[i, j] * q[j]
+            if score > vals[k - 1]:
+                # Insertion into the block's descending top-k
+                p = k - 1
+                while p > 0 and vals[p - 1] < score:
+                    vals[p] = vals[p - 1]
+                    idx[p] = idx[p - 1]
+                    p -= 1
+                vals[p] = score
+                idx[p] = i
+    
+    return cand_idx.ravel(), cand_val.ravel()
+
+
+_topk_dot = njit(parallel=True, fastmath=True, cache=True)(_topk_dot_kernel) if njit else None
+
 
 class InMemoryIndex:
     """
@@ -20,8 +68,26 @@ class InMemoryIndex:
     replace with QdrantIndex or similar vector database.
     """
     
-    def __init__(self):
-        self.docs: List[Dict] = []  # {"id": str, "text": str, "emb": np.array}
+    def __init__(self, initial_capacity: int = 1024):
+        # Struct-of-arrays layout: row i of _embs belongs to _ids[i] / _texts[i].
+        # Only the first _count rows are in use; capacity doubles when full.
+        self._embs: Optional[np.ndarray] = None
+        self._scores: Optional[np.ndarray] = None  # query output buffer, same capacity as _embs
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._count = 0
+        self._initial_capacity = initial_capacity
+    
+    def _reserve(self, dim: int):
+        """Make room for one more row, doubling the embedding matrix when full."""
+        if self._embs is None:
+            self._embs = np.empty((self._initial_capacity, dim), dtype=np.float32)
+            self._scores = np.empty(self._initial_capacity, dtype=np.float32)
+        elif self._count == len(self._embs):
+            grown = np.empty((2 * len(self._embs), dim), dtype=np.float32)
+            grown[:self._count] = self._embs[:self._count]
+            self._embs = grown
+            self._scores = np.empty(len(grown), dtype=np.float32)
     
     def add_document(self, doc_id: str, text: str, embedding: np.ndarray):
         """
@@ -32,15 +98,14 @@ class InMemoryIndex:
             text: Full text content
             embedding: Vector embedding of the text
         """
-        emb = np.array(embedding, dtype=np.float32)
-        # Normalize embedding
-        emb = emb / (np.linalg.norm(emb) + 1e-8)
+        emb = np.asarray(embedding, dtype=np.float32).ravel()
+        self._reserve(emb.shape[0])
         
-        self.docs.append({
-            "id": doc_id,
-            "text": text,
-            "emb": emb
-        })
+        # Store normalized so a dot product gives cosine similarity
+        self._embs[self._count] = emb / (np.linalg.norm(emb) + 1e-8)
+        self._ids.append(doc_id)
+        self._texts.append(text)
+        self._count += 1
         logger.info(f"Added document to index: {doc_id}")
     
     def query(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
@@ -54,38 +119,75 @@ class InMemoryIndex:
         Returns:
             List of dicts with keys: id, text, score
         """
-        if not self.docs:
+        if not self._count:
             logger.warning("Index is empty - no documents to search")
             return []
         
-        q = np.array(query_embedding, dtype=np.float32)
-        q = q / (np.linalg.norm(q) + 1e-8)
+        if top_k <= 0:
+            return []
+        
+        # The query is not normalized: scaling it doesn't change the ranking,
+        # so only the top K scores are divided by its norm afterwards
+        q = np.ascontiguousarray(query_embedding, dtype=np.float32).ravel()
+        inv_norm = 1.0 / (np.linalg.norm(q) + 1e-8)
+        
+        if _topk_dot is not None and NUMBA_MIN_DOCS < self._count and top_k < self._count:
+            return self._query_numba(q, top_k, inv_norm)
         
-        # Compute cosine similarity with all documents
-        embs = np.stack([d["emb"] for d in self.docs], axis=0)
-        similarities = embs @ q  # Already normalized, so dot product = cosine sim
+        # Dot product with all (normalized) documents in one BLAS matrix-vector
+        # product, written into the preallocated buffer (not thread-safe)
+        similarities = self._scores[:self._count]
+        np.dot(self._embs[:self._count], q, out=similarities)
         
-        # Get top K results
-        top_idx = np.argsort(-similarities)[:top_k]
+        # Get top K results: partial selection is O(N), then only K are sorted
+        if top_k < len(similarities):
+            top_idx = np.argpartition(-similarities, top_k)[:top_k]
+        else:
+            top_idx = np.arange(len(similarities))
+        top_idx = top_idx[np.argsort(-similarities[top_idx], kind="stable")]
         
         results = []
         for i in top_idx:
             results.append({
-                "id": self.docs[i]["id"],
-                "text": self.docs[i]["text"],
-                "score": float(similarities[i])
+                "id": self._ids[i],
+                "text": self._texts[i],
+                "score": float(similarities[i] * inv_norm)  # cosine similarity
             })
         
         logger.info(f"Query returned {len(results)} results")
         return results
     
+    def _query_numba(self, q: np.ndarray, top_k: int, inv_norm: float) -> List[Dict]:
+        """Top-k search with the fused numba kernel (large indexes only)."""
+        n_blocks = max(1, min(64, self._count // top_k))
+        cand_idx, cand_val = _topk_dot(self._embs[:self._count], q, top_k, n_blocks)
+        
+        valid = cand_idx >= 0
+        cand_idx, cand_val = cand_idx[valid], cand_val[valid]
+        best = np.argsort(-cand_val, kind="stable")[:top_k]
+        
+        results = [
+            {
+                "id": self._ids[i],
+                "text": self._texts[i],
+                "score": float(score * inv_norm)  # cosine similarity
+            }
+            for i, score in zip(cand_idx[best], cand_val[best])
+        ]
+        logger.info(f"Query returned {len(results)} results")
+        return results
+    
     def get_document_count(self) -> int:
         """Get the number of documents in the index."""
-        return len(self.docs)
+        return self._count
     
     def clear(self):
         """Clear all documents from the index."""
-        self.docs.clear()
+        self._embs = None
+        self._scores = None
+        self._ids.clear()
+        self._texts.clear()
+        self._count = 0
         logger.info("Index cleared")
 
 
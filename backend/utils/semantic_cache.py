@@ -0,0 +1,94 @@
+"""
+Semantic answer cache.
+
+Keeps the embeddings of recently answered questions in a single numpy
+matrix so that a paraphrased repeat of an earlier question can be answered
+with one matrix-vector product instead of a Qdrant search and an LLM call.
+"""
+
+import threading
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """In-memory cache of answers keyed by query-embedding similarity."""
+
+    def __init__(self, dim: int = 384, max_entries: int = 1000, threshold: float = 0.95):
+        """
+        Initialize an empty cache.
+
+        Args:
+            dim: Dimensionality of the query embeddings
+            max_entries: Maximum number of cached answers (oldest evicted first)
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        self.dim = dim
+        self.max_entries = max_entries
+        self.threshold = threshold
+
+        # Ring buffer: row i of _embs / _top_ks belongs to _entries[i]
+        self._embs = np.zeros((max_entries, dim), dtype=np.float32)
+        self._top_ks = np.zeros(max_entries, dtype=np.int64)
+        self._entries = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        q = np.asarray(embedding, dtype=np.float32)
+        return q / (np.linalg.norm(q) + 1e-8)
+
+    def lookup(self, query_embedding, top_k: int) -> Optional[Dict]:
+        """
+        Find a cached answer for a semantically equivalent question.
+
+        Args:
+            query_embedding: Embedding of the incoming question
+            top_k: Number of chunks the caller would retrieve
+
+        Returns:
+            The cached response dictionary, or None on a miss
+        """
+        q = self._normalize(query_embedding)
+        with self._lock:
+            if self._size == 0:
+                return None
+            sims = self._embs[:self._size] @ q
+            # Answers built from a different number of chunks can't be reused
+            sims[self._top_ks[:self._size] != top_k] = -np.inf
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                logger.info(f"Semantic cache hit (similarity {sims[best]:.3f})")
+                return self._entries[best]["response"]
+        return None
+
+    def add(self, query_embedding, top_k: int, response: Dict):
+        """
+        Cache the response for a question, evicting the oldest entry when full.
+
+        Args:
+            query_embedding: Embedding of the answered question
+            top_k: Number of chunks used to build the answer
+            response: Response dictionary returned to the client
+        """
+        q = self._normalize(query_embedding)
+        with self._lock:
+            self._embs[self._next] = q
+            self._top_ks[self._next] = top_k
+            self._entries[self._next] = {"top_k": top_k, "response": response}
+            self._next = (self._next + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def clear(self):
+        """Drop all cached answers (e.g. after new documents are indexed)."""
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._size = 0
+            self._next = 0
+        logger.info("Semantic cache cleared")
@@ -8,34 +8,123 @@ across server restarts.
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Optional, Union
 import hashlib
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Block size for hashing file objects
+HASH_BLOCK_SIZE = 1 << 20
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes):
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class DocumentStorage:
-    """Manages persistent storage of document metadata and content."""
+    """
+    Manages persistent storage of document metadata and content.
+    
+    Metadata is kept as a JSON snapshot plus an append-only JSONL log of
+    changes since the snapshot (one metadata record or deletion marker per
+    line). Both are replayed at startup; compact() folds the log back into
+    the snapshot once it grows well past the number of documents.
+    """
     
     def __init__(self, storage_dir: Path):
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(exist_ok=True)
         self.metadata_file = storage_dir / "documents_metadata.json"
+        self.log_file = storage_dir / "metadata.log"
+        self._log_entries = 0
+        self._log_damaged = False
         self.documents: Dict[str, Dict] = self._load_metadata()
+        self._log = open(self.log_file, 'ab')
+        if self._log_damaged:
+            # Don't append after a torn line; start from a clean snapshot
+            self.compact()
     
     def _load_metadata(self) -> Dict[str, Dict]:
-        """Load document metadata from disk."""
+        """Load the metadata snapshot from disk and replay the change log."""
+        documents: Dict[str, Dict] = {}
         if self.metadata_file.exists():
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+            with open(self.metadata_file, 'rb') as f:
+                documents = _loads(f.read())
+        
+        if self.log_file.exists():
+            with open(self.log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = _loads(line)
+                    except ValueError:
+                        # Partial last line from an interrupted write
+                        self._log_damaged = True
+                        continue
+                    self._log_entries += 1
+                    if "deleted" in record:
+                        documents.pop(record["deleted"], None)
+                    else:
+                        documents[record["hash"]] = record
+        return documents
     
-    def _save_metadata(self):
-        """Save document metadata to disk."""
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.documents, f, indent=2, ensure_ascii=False)
+    def _append_log(self, record: Dict):
+        """Append a change to the log, compacting it when it grows too long."""
+        self._log.write(_dumps(record) + b'\n')
+        self._log.flush()
+        self._log_entries += 1
+        if self._log_entries > 4 * max(len(self.documents), 1):
+            self.compact()
     
-    def get_document_hash(self, content: bytes) -> str:
-        """Generate a hash for document content to detect duplicates."""
-        return hashlib.sha256(content).hexdigest()
+    def commit(self):
+        """Force logged changes to disk."""
+        self._log.flush()
+        os.fsync(self._log.fileno())
+    
+    def compact(self):
+        """Write a fresh metadata snapshot and truncate the change log."""
+        tmp_file = self.metadata_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(_dumps(self.documents, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.metadata_file)
+        
+        self._log.truncate(0)
+        self._log_entries = 0
+    
+    def close(self):
+        """Flush pending changes and close the change log."""
+        if not self._log.closed:
+            self.commit()
+            self._log.close()
+    
+    def get_document_hash(self, content: Union[bytes, BinaryIO]) -> str:
+        """
+        Generate a hash for document content to detect duplicates.
+        
+        Accepts the raw bytes or a binary file object; file objects are read
+        in 1 MiB blocks so large uploads never need to be held in memory.
+        """
+        h = hashlib.blake2b(digest_size=32)
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            h.update(content)
+        else:
+            for block in iter(lambda: content.read(HASH_BLOCK_SIZE), b""):
+                h.update(block)
+        return h.hexdigest()
     
     def document_exists(self, doc_hash: str) -> bool:
         """Check if a document with this hash already exists."""
@@ -75,7 +164,7 @@ class DocumentStorage:
         }
         
         self.documents[doc_hash] = metadata
-        self._save_metadata()
+        self._append_log(metadata)
         
         return metadata
     
@@ -109,6 +198,6 @@ class DocumentStorage:
         
         # Remove from metadata
         del self.documents[doc_hash]
-        self._save_metadata()
+        self._append_log({"deleted": doc_hash})
         
         return True
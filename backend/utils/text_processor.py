@@ -1,8 +1,7 @@
 import os
-import re
 from typing import List
-from PyPDF2 import PdfReader
-from docx import Document
+
+from .loader import clean_text, process_file
 
 # -----------------------------------------------
 # Text Processor for Learnix
@@ -11,72 +10,49 @@ from docx import Document
 # 1. Extract text from PDF, DOCX, or TXT files
 # 2. Clean unwanted elements (page numbers, line breaks)
 # 3. Split text into semantically meaningful chunks
+#
+# Extraction and cleaning are shared with loader.py
+# (process_file / clean_text); only chunking lives here.
 # -----------------------------------------------
 
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
 
 def extract_text(file_path: str) -> str:
     """Extract plain text from supported document formats."""
-    text = ""
     extension = os.path.splitext(file_path)[-1].lower()
 
     try:
-        if extension == ".pdf":
-            reader = PdfReader(file_path)
-            for page in reader.pages:
-                content = page.extract_text()
-                if content:
-                    text += content + " "
-        elif extension == ".docx":
-            doc = Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + " "
-        elif extension == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-        else:
+        if extension not in SUPPORTED_EXTENSIONS:
             raise ValueError(f"Unsupported file format: {extension}")
-
+        with open(file_path, "rb") as f:
+            return process_file(os.path.basename(file_path), f.read())
     except Exception as e:
         print(f"❌ Error reading {file_path}: {e}")
         return ""
 
-    return clean_text(text)
-
-
-def clean_text(text: str) -> str:
-    """Remove page numbers, excessive whitespace, and non-printable characters."""
-    if not text:
-        return ""
-    text = re.sub(r'\bPage\s*\d+\b', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+', ' ', text)
-    text = text.encode("ascii", "ignore").decode()  # remove special chars
-    return text.strip()
-
 
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """
     Split large text into overlapping chunks for embedding generation.
     Each chunk has slight overlap with the previous to preserve context.
     """
-    if not text:
-        return []
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("overlap must be smaller than chunk_size")
 
-    words = text.split()
-    chunks = []
-    start = 0
-
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunk = " ".join(words[start:end])
-        chunks.append(chunk)
-        start += chunk_size - overlap  # slide window
-        if end == len(words):
-            break
+    words = text.split() if text else []
+    if not words:
+        return []
 
-    return chunks
+    # Windows start every `step` words; the last one is the first that reaches the end
+    return [
+        " ".join(words[start:start + chunk_size])
+        for start in range(0, max(len(words) - max(overlap, 0), 1), step)
+    ]
 
 
-# Example usage (for testing standalone):
+# Example usage (from backend/: python -m utils.text_processor):
 if __name__ == "__main__":
     test_path = "sample.pdf"
     if os.path.exists(test_path):
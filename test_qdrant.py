@@ -5,8 +5,17 @@ Run this to ensure everything is configured correctly.
 
 import os
 import sys
+import argparse
+import asyncio
+import shelve
+import hashlib
+import time
+from functools import lru_cache
 from pathlib import Path
 
+# OpenMP reads this when torch is first imported, so set it before anything loads torch
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
@@ -15,35 +24,247 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv(Path(__file__).parent / "backend" / ".env")
 
+# Model used for the embedding tests: the production model by default. Set
+# TEST_EMBEDDING_MODEL=sentence-transformers/static-retrieval-mrl-en-v1 for a
+# much faster static model (needs sentence-transformers >= 3.3; the pinned
+# versions fall back to the production model)
+FALLBACK_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+TEST_EMBEDDING_MODEL = os.getenv("TEST_EMBEDDING_MODEL", FALLBACK_EMBEDDING_MODEL)
+EMBEDDING_DIM = 384  # Qdrant collection vector size
+
+# Set TEST_TORCH_COMPILE=1 to compile the transformer with torch.compile
+# (slower start-up while it compiles, faster encodes afterwards)
+TEST_TORCH_COMPILE = os.getenv("TEST_TORCH_COMPILE", "").lower() in ("1", "true", "yes")
+
+# Set TEST_BF16=1 to run the SentenceTransformer encodes under autocast
+# (bfloat16 on CPU, float16 on GPU); stored vectors stay float32
+TEST_BF16 = (
+    os.getenv("TEST_BF16", "").lower() in ("1", "true", "yes")
+    and os.getenv("EMBEDDING_BACKEND", "").lower() != "onnx"
+)
+
+# Same transport settings as the app (gRPC first, HTTP if it is unreachable)
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() in ("1", "true", "yes")
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+
+# Embeddings of the fixed test strings are cached here between runs
+EMBEDDING_CACHE_FILE = Path.home() / ".cache" / "learnix" / "test_embeddings"
+
+
+def load_encoder():
+    """
+    Load the encoder used by the embedding tests.
+    
+    With EMBEDDING_BACKEND=onnx this is the same INT8-quantized ONNX Runtime
+    export of EMBEDDING_MODEL (MiniLM by default) that the app uses, exported
+    and cached on first use; otherwise a SentenceTransformer model.
+    
+    Returns:
+        Tuple of (encoder, model name)
+    """
+    if os.getenv("EMBEDDING_BACKEND", "").lower() == "onnx":
+        from backend.utils.onnx_encoder import OnnxSentenceEncoder
+        model_name = os.getenv("EMBEDDING_MODEL", FALLBACK_EMBEDDING_MODEL)
+        return OnnxSentenceEncoder(model_name), model_name
+    
+    import torch
+    # Use every core for the matmuls; inter-op parallelism doesn't help a single model
+    torch.set_num_threads(max(1, os.cpu_count() or 1))
+    torch.set_num_interop_threads(1)
+    
+    from sentence_transformers import SentenceTransformer
+    model_name = TEST_EMBEDDING_MODEL
+    if model_name == FALLBACK_EMBEDDING_MODEL:
+        model = SentenceTransformer(model_name)
+    else:
+        try:
+            # E.g. static embeddings: a table lookup + mean pool, far cheaper than
+            # a transformer; MRL lets them be truncated to the collection's 384
+            # dims (truncate_dim needs sentence-transformers >= 3.0)
+            model = SentenceTransformer(model_name, truncate_dim=EMBEDDING_DIM)
+        except Exception as e:
+            print(f"   ⚠️  Could not load {model_name} ({e}); using {FALLBACK_EMBEDDING_MODEL}")
+            model = SentenceTransformer(FALLBACK_EMBEDDING_MODEL)
+            model_name = FALLBACK_EMBEDDING_MODEL
+    
+    if TEST_TORCH_COMPILE:
+        compile_encoder(model)
+    return model, model_name
+
+
+def compile_encoder(model):
+    """
+    Replace the model's transformer with a torch.compile'd version, in place.
+    
+    Static embedding models have no transformer and are left as they are. If
+    compilation fails (it needs a supported Python and a C++ compiler), the
+    eager module is restored.
+    """
+    import torch
+    
+    first = model._first_module()
+    eager = getattr(first, "auto_model", None)
+    if eager is None:
+        return
+    
+    try:
+        # dynamic=True: encode() pads each batch to its longest text, so the
+        # sequence length changes between calls
+        first.auto_model = torch.compile(eager, dynamic=True)
+        # Compilation happens on the first forward pass
+        model.encode(["warmup"] * 8, show_progress_bar=False)
+        print("   ✅ Compiled the transformer with torch.compile")
+    except Exception as e:
+        first.auto_model = eager
+        print(f"   ⚠️  torch.compile unavailable ({e}); using eager mode")
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    """Load the test encoder once; all tests (and QdrantStore, if it uses the same model) share it."""
+    return load_encoder()
+
+
+def cached_encode(texts):
+    """
+    Encode texts with the test model, reusing embeddings from earlier runs.
+    
+    Entries are keyed on a blake2b hash of the model name, precision and text,
+    so only texts not seen before with this model go through the model (in
+    one batch).
+    
+    Returns:
+        Tuple of (normalized float32 array of shape (len(texts), dim), number of cache hits)
+    """
+    import numpy as np
+    
+    model, model_name = get_model()
+    key_prefix = f"{model_name}\0bf16" if TEST_BF16 else model_name
+    keys = [hashlib.blake2b(f"{key_prefix}\0{t}".encode("utf-8"), digest_size=16).hexdigest() for t in texts]
+    
+    EMBEDDING_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with shelve.open(str(EMBEDDING_CACHE_FILE)) as cache:
+        rows = [cache.get(k) for k in keys]
+        misses = [i for i, row in enumerate(rows) if row is None]
+        if misses:
+            batch = [texts[i] for i in misses]
+            options = dict(batch_size=32, normalize_embeddings=True, show_progress_bar=False)
+            if TEST_BF16:
+                import torch
+                on_gpu = model.device.type == "cuda"
+                with torch.autocast(device_type=model.device.type, dtype=torch.float16 if on_gpu else torch.bfloat16):
+                    encoded = model.encode(batch, convert_to_tensor=True, **options)
+                # numpy has no bfloat16; convert back to float32 for the cache and Qdrant
+                encoded = encoded.float().cpu().numpy()
+            else:
+                encoded = model.encode(batch, convert_to_numpy=True, **options).astype(np.float32)
+            for i, vector in zip(misses, encoded):
+                rows[i] = cache[keys[i]] = vector.tobytes()
+    
+    embeddings = np.stack([np.frombuffer(row, dtype=np.float32) for row in rows])
+    return embeddings, len(texts) - len(misses)
+
+
+def is_not_found(error):
+    """Whether a Qdrant error means "no such collection" (HTTP 404 / gRPC NOT_FOUND)."""
+    import grpc
+    from qdrant_client.http.exceptions import UnexpectedResponse
+    
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 404
+    return isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.NOT_FOUND
+
+
+async def probe_qdrant(url, api_key, collection_name, prefer_grpc=False, list_collections=False):
+    """
+    Fetch the test collection's info, which also proves the connection works.
+    
+    With list_collections, the collection list is fetched concurrently, so the
+    two network round trips overlap.
+    
+    Returns:
+        Tuple of (collection info, or None if the collection doesn't exist yet;
+        collections response, or None unless list_collections)
+    """
+    from qdrant_client import AsyncQdrantClient
+    
+    client = AsyncQdrantClient(
+        url=url,
+        api_key=api_key,
+        timeout=30,
+        prefer_grpc=prefer_grpc,
+        grpc_port=QDRANT_GRPC_PORT
+    )
+    try:
+        requests = [client.get_collection(collection_name)]
+        if list_collections:
+            requests.append(client.get_collections())
+        results = await asyncio.gather(*requests, return_exceptions=True)
+    finally:
+        await client.close()
+    
+    info = results[0]
+    if isinstance(info, Exception):
+        if not is_not_found(info):
+            raise info
+        info = None
+    collections = results[1] if list_collections else None
+    if isinstance(collections, Exception):
+        raise collections
+    return info, collections
+
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument(
+    "--verbose",
+    action="store_true",
+    help="also list every collection on the server (one extra request)"
+)
+parser.add_argument(
+    "--chunks",
+    type=int,
+    default=3,
+    metavar="N",
+    help="number of chunks stored in Test 7 (more than 3 adds synthetic ones, to time batched uploads)"
+)
+args = parser.parse_args()
+
 print("🧪 Testing Qdrant Integration\n")
 print("=" * 50)
 
 # Test 1: Check environment variables
 print("\n1️⃣  Checking environment variables...")
-qdrant_url = os.getenv("QDRANT_URL")
-qdrant_key = os.getenv("QDRANT_API_KEY")
-collection = os.getenv("QDRANT_COLLECTION")
-
-if qdrant_url:
-    print(f"   ✅ QDRANT_URL: {qdrant_url[:50]}...")
-else:
-    print("   ❌ QDRANT_URL not set")
-    sys.exit(1)
+# (name, required, characters shown) for each setting
+ENV_VARS = (
+    ("QDRANT_URL", True, 50),
+    ("QDRANT_API_KEY", True, 20),
+    ("QDRANT_COLLECTION", False, None),
+)
+config = {name: os.environ.get(name) for name, _, _ in ENV_VARS}
 
-if qdrant_key:
-    print(f"   ✅ QDRANT_API_KEY: {qdrant_key[:20]}...")
-else:
-    print("   ❌ QDRANT_API_KEY not set")
+# Report every missing variable before exiting, not just the first one
+missing = []
+for name, required, shown in ENV_VARS:
+    value = config[name]
+    if value and shown:
+        print(f"   ✅ {name}: {value[:shown]}...")
+    elif value or not required:
+        print(f"   ✅ {name}: {value}")
+    else:
+        print(f"   ❌ {name} not set")
+        missing.append(name)
+if missing:
     sys.exit(1)
 
-print(f"   ✅ QDRANT_COLLECTION: {collection}")
+qdrant_url = config["QDRANT_URL"]
+qdrant_key = config["QDRANT_API_KEY"]
+collection = config["QDRANT_COLLECTION"]
 
 # Test 2: Import and load embedding model
 print("\n2️⃣  Loading embedding model...")
 try:
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    print("   ✅ Embedding model loaded successfully")
+    model, model_name = get_model()
+    print(f"   ✅ Embedding model loaded successfully: {model_name} ({type(model).__name__})")
 except Exception as e:
     print(f"   ❌ Failed to load model: {e}")
     sys.exit(1)
@@ -51,10 +272,29 @@ except Exception as e:
 # Test 3: Generate test embedding
 print("\n3️⃣  Generating test embedding...")
 try:
-    test_text = "This is a test sentence for embedding generation."
-    embedding = model.encode(test_text)
-    print(f"   ✅ Generated embedding with shape: {embedding.shape}")
+    import numpy as np
+    
+    # One batched call (the model sorts by length and pads per batch) also
+    # warms the model up before the storage tests
+    warmup_batch = [
+        "This is a test sentence for embedding generation.",
+        "Short one.",
+        "A somewhat longer sentence that checks padding within a batch of mixed lengths."
+    ]
+    embeddings, cache_hits = cached_encode(warmup_batch)
+    embedding = embeddings[0]
+    print(f"   ✅ Generated {len(embeddings)} embeddings with shape: {embeddings.shape}")
+    print(f"   ✅ {cache_hits} of {len(embeddings)} served from {EMBEDDING_CACHE_FILE}")
+    if len(embedding) != EMBEDDING_DIM:
+        print(f"   ❌ Embedding dimension {len(embedding)} does not match the collection ({EMBEDDING_DIM})")
+        sys.exit(1)
     print(f"   ✅ Embedding dimension: {len(embedding)}")
+    # QdrantStore hands its vectors to the client as one C-contiguous float32
+    # array, sliced per upload batch; make sure the test encoder matches
+    if embeddings.dtype != np.float32 or not embeddings.flags.c_contiguous:
+        print(f"   ❌ Embeddings are {embeddings.dtype}, not C-contiguous float32")
+        sys.exit(1)
+    print("   ✅ Embedding layout: C-contiguous float32")
 except Exception as e:
     print(f"   ❌ Failed to generate embedding: {e}")
     sys.exit(1)
@@ -62,11 +302,24 @@ except Exception as e:
 # Test 4: Connect to Qdrant
 print("\n4️⃣  Connecting to Qdrant...")
 try:
-    from qdrant_client import QdrantClient
-    client = QdrantClient(url=qdrant_url, api_key=qdrant_key, timeout=30)
-    collections = client.get_collections()
-    print(f"   ✅ Connected to Qdrant")
-    print(f"   ✅ Found {len(collections.collections)} collection(s)")
+    # The collection info request used by Test 5 doubles as the connection check
+    try:
+        info, collections = asyncio.run(probe_qdrant(
+            qdrant_url, qdrant_key, collection,
+            prefer_grpc=QDRANT_PREFER_GRPC, list_collections=args.verbose
+        ))
+        transport = "gRPC" if QDRANT_PREFER_GRPC else "HTTP"
+    except Exception as e:
+        if not QDRANT_PREFER_GRPC:
+            raise
+        print(f"   ⚠️  gRPC connection failed ({e}); retrying over HTTP")
+        info, collections = asyncio.run(
+            probe_qdrant(qdrant_url, qdrant_key, collection, list_collections=args.verbose)
+        )
+        transport = "HTTP"
+    print(f"   ✅ Connected to Qdrant over {transport}")
+    if collections is not None:
+        print(f"   ✅ Found {len(collections.collections)} collection(s)")
 except Exception as e:
     print(f"   ❌ Failed to connect to Qdrant: {e}")
     sys.exit(1)
@@ -74,12 +327,11 @@ except Exception as e:
 # Test 5: Check/Create collection
 print("\n5️⃣  Checking collection...")
 try:
-    collection_names = [c.name for c in collections.collections]
-    if collection in collection_names:
+    if info is not None:
         print(f"   ✅ Collection '{collection}' exists")
-        info = client.get_collection(collection)
         print(f"   📊 Points count: {info.points_count}")
         print(f"   📊 Status: {info.status}")
+        print(f"   📊 Quantization: {info.config.quantization_config or 'none (FP32 only)'}")
     else:
         print(f"   ℹ️  Collection '{collection}' does not exist yet")
         print(f"   ℹ️  It will be created automatically on first upload")
@@ -90,9 +342,13 @@ except Exception as e:
 print("\n6️⃣  Testing QdrantStore module...")
 try:
     from backend.utils.qdrant_store import create_qdrant_store
-    store = create_qdrant_store()
+    store = create_qdrant_store(prefer_grpc=QDRANT_PREFER_GRPC)
     if store:
         print("   ✅ QdrantStore initialized successfully")
+        # Hand the already loaded encoder to the store instead of letting it load its own copy
+        if store.embedding_model is None and store.embedding_model_name == model_name:
+            store.embedding_model = model
+            print(f"   ✅ Sharing the loaded {model_name} encoder with QdrantStore")
         info = store.get_collection_info()
         print(f"   📊 Collection info: {info}")
     else:
@@ -112,15 +368,23 @@ try:
         "It focuses on building systems that learn from data.",
         "Neural networks are inspired by biological neurons."
     ]
+    test_chunks += [
+        f"Synthetic chunk {i} exercises batched, concurrent uploads to Qdrant."
+        for i in range(len(test_chunks), args.chunks)
+    ]
     
+    # upsert_chunks embeds all chunks in one length-sorted batch; the chunks
+    # are passed in document order because their position is the chunk_index
+    start = time.perf_counter()
     result = store.upsert_chunks(
         chunks=test_chunks,
         filename="test_document.txt",
         metadata={"test": True}
     )
+    elapsed = time.perf_counter() - start
     
     if result["status"] == "success":
-        print(f"   ✅ Successfully stored {result['count']} test chunks")
+        print(f"   ✅ Successfully stored {result['count']} test chunks in {elapsed:.2f}s")
     else:
         print(f"   ❌ Failed to store chunks: {result['message']}")
         sys.exit(1)
@@ -134,15 +398,23 @@ except Exception as e:
 print("\n8️⃣  Testing similarity search...")
 try:
     query = "What is machine learning?"
-    results = store.search_similar_chunks(query, top_k=2)
+    # Reuse the cached query embedding when the store embeds with the same model
+    query_embedding = None
+    if store.embedding_model is model:
+        query_embedding = cached_encode([query])[0][0].tolist()
+    results = store.search_similar_chunks(query, top_k=2, query_embedding=query_embedding)
     
     if results:
+        import numpy as np
+        
         print(f"   ✅ Found {len(results)} similar chunks")
-        for i, result in enumerate(results, 1):
-            print(f"   📄 Result {i}:")
-            print(f"      Text: {result['text'][:60]}...")
-            print(f"      Score: {result['score']:.4f}")
-            print(f"      Source: {result['filename']}")
+        # One row per hit in a single structured array, written out in one call
+        hits = np.array(
+            [(r["score"], r["filename"], r["text"][:60]) for r in results],
+            dtype=[("score", "f4"), ("filename", "U255"), ("text", "U60")]
+        )
+        print("   📊 Score   Source  Text")
+        np.savetxt(sys.stdout, hits, fmt="   📄 %.4f  %s  %s...")
     else:
         print("   ⚠️  No results found (this may be expected)")
 except Exception as e:
@@ -154,7 +426,8 @@ except Exception as e:
 # Test 9: Clean up test data
 print("\n9️⃣  Cleaning up test data...")
 try:
-    success = store.delete_document_chunks("test_document.txt")
+    # Nothing reads the collection afterwards, so don't wait for the delete to be applied
+    success = store.delete_document_chunks("test_document.txt", wait=False)
     if success:
         print("   ✅ Test chunks deleted successfully")
     else: